@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the resume-file overhead of ProgressManager.
+
+Marks 10k, 100k and 1M synthetic domains as checked through the journal backend
+and reports the per-domain cost, on-disk size and replay time. The legacy
+full-rewrite backend is quadratic, so its total is estimated from the cost of a
+single rewrite at the midpoint size instead of being run to completion.
+
+Usage: python benchmarks/checkpoint_bench.py [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rchecker.main import ProgressManager  # noqa: E402
+
+
+def _domains(count: int):
+    return (f"bench{i:07d}.com" for i in range(count))
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+async def bench_journal(count: int, directory: str) -> dict:
+    path = os.path.join(directory, f"journal_{count}.json")
+    pm = ProgressManager(path)
+    start = time.perf_counter()
+    for domain in _domains(count):
+        await pm.mark_checked(domain)
+    pm.close()
+    elapsed = time.perf_counter() - start
+    disk = _file_size(path) + _file_size(f"{path}.journal")
+
+    start = time.perf_counter()
+    replayed = ProgressManager(path)
+    replay = time.perf_counter() - start
+    assert len(replayed.checked_domains) == count
+    replayed.cleanup()
+    return {"elapsed": elapsed, "disk": disk, "replay": replay}
+
+
+def estimate_legacy(count: int, directory: str) -> float:
+    """Estimate the total cost of rewriting the whole set once per domain."""
+    path = os.path.join(directory, f"legacy_{count}.json")
+    sample = [f"bench{i:07d}.com" for i in range(count // 2)]
+    rounds = 3
+    start = time.perf_counter()
+    for _ in range(rounds):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"checked_domains": sample}, f, ensure_ascii=False, indent=2)
+    per_rewrite = (time.perf_counter() - start) / rounds
+    os.remove(path)
+    return per_rewrite * count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(
+        f"{'domains':>10} {'journal s':>10} {'us/domain':>10} "
+        f"{'disk MB':>8} {'replay s':>9} {'legacy est. s':>14}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            result = asyncio.run(bench_journal(count, directory))
+            legacy = estimate_legacy(count, directory)
+            print(
+                f"{count:>10,} {result['elapsed']:>10.2f} "
+                f"{result['elapsed'] / count * 1e6:>10.2f} "
+                f"{result['disk'] / 1e6:>8.2f} {result['replay']:>9.2f} "
+                f"{legacy:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Chunk-boundary check for the streaming RDAP field reader.
+
+Feeds the mock RDAP body from ``rchecker bench`` to TopLevelFields in chunks of
+1 to 64 bytes and in one piece, both compact and pretty-printed with blanks
+around every separator, and compares what it extracts with json.loads. Network
+reads split bodies anywhere, including inside the blanks between tokens, and a
+boundary bug drops fields silently instead of failing a lookup.
+
+Usage: python benchmarks/rdapjson_check.py
+"""
+
+import itertools
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rchecker.bench import _DOMAIN_BODY  # noqa: E402
+from rchecker.rdapjson import RDAP_FIELDS, TopLevelFields  # noqa: E402
+
+
+def read_in_chunks(body: bytes, size: int) -> dict:
+    reader = TopLevelFields()
+    for start in range(0, len(body), size):
+        if reader.feed(body[start : start + size]):
+            break
+    return reader.values
+
+
+def main() -> None:
+    document = json.loads(_DOMAIN_BODY)
+    wanted = {name: document[name] for name in RDAP_FIELDS}
+    bodies = {
+        "compact": _DOMAIN_BODY,
+        "pretty": b"  "
+        + json.dumps(document, indent=2, separators=(" , ", " : ")).encode(),
+    }
+    failures = 0
+    for style, body in bodies.items():
+        sizes = list(itertools.chain(range(1, 65), [len(body)]))
+        bad = [size for size in sizes if read_in_chunks(body, size) != wanted]
+        failures += len(bad)
+        print(
+            f"{style:>8}: {len(body):>5} bytes, {len(sizes)} chunk sizes, "
+            f"{'mismatch at ' + ', '.join(map(str, bad)) if bad else 'ok'}"
+        )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,18 @@ and the RDAP protocol, supporting pattern matching and wordlist modes with check
 __version__ = "0.1.0"
 __author__ = "Rain-kl"
 
+from .cache import ResultCache
+from .checker import Checker
 from .main import ProgressManager, RateLimiter, Stats, WORDLIST_SOURCES, main
+from .result import LookupResult
 
-__all__ = ["ProgressManager", "RateLimiter", "Stats", "WORDLIST_SOURCES", "main"]
\ No newline at end of file
+__all__ = [
+    "Checker",
+    "LookupResult",
+    "ProgressManager",
+    "RateLimiter",
+    "ResultCache",
+    "Stats",
+    "WORDLIST_SOURCES",
+    "main",
+]
\ No newline at end of file
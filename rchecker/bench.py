@@ -0,0 +1,428 @@
+"""
+Offline benchmark: the full check pipeline against a local mock RDAP server.
+
+``rchecker bench`` starts an aiohttp mock server on localhost, then drives
+``run()`` (generator, queues, workers, limiter, stats, checkpoint and outputs)
+over a grid of --concurrency and --rate settings. It reports throughput, CPU
+time per lookup and memory, so regressions in RChecker's own overhead show up
+independently of any real registry.
+
+The mock runs on its own thread and event loop, and CPU is measured with
+``time.thread_time()`` on the thread driving the scan, so the server's work is
+not counted against the checker.
+
+With ``--transport http2`` in the grid, the mock also serves cleartext HTTP/2
+(h2c, built on the ``h2`` package that comes with ``rchecker[http2]``) on a
+second port, so the HTTP/2 transport can be compared with aiohttp against the
+same answers and latencies.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import os
+import random
+import shlex
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from typing import Callable, Tuple
+
+from aiohttp import web
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from h2.config import H2Configuration
+    from h2.connection import H2Connection
+    from h2.events import ConnectionTerminated, RequestReceived
+    from h2.exceptions import H2Error, ProtocolError
+except ImportError:  # optional: pip install 'rchecker[http2]'
+    H2Connection = None
+
+
+# A registered domain as registries return it: status and events sit among
+# entities, links and notices that make up most of the few KB
+_DOMAIN_BODY = json.dumps(
+    {
+        "objectClassName": "domain",
+        "handle": "@NAME@-MOCK",
+        "ldhName": "@NAME@",
+        "links": [
+            {
+                "value": "https://rdap.example/domain/@NAME@",
+                "rel": rel,
+                "href": "https://rdap.example/domain/@NAME@",
+                "type": "application/rdap+json",
+            }
+            for rel in ("self", "related")
+        ],
+        "status": ["client transfer prohibited", "server delete prohibited"],
+        "entities": [
+            {
+                "objectClassName": "entity",
+                "handle": f"MOCK-{role.upper()}",
+                "roles": [role],
+                "vcardArray": [
+                    "vcard",
+                    [
+                        ["version", {}, "text", "4.0"],
+                        ["fn", {}, "text", f"Example {role.title()} Services, Inc."],
+                        [
+                            "adr",
+                            {},
+                            "text",
+                            ["", "", "1 Example Way", "Springfield", "", "00000", "US"],
+                        ],
+                        ["tel", {"type": "voice"}, "uri", "tel:+1.5555550100"],
+                        ["email", {}, "text", f"{role}@example.net"],
+                    ],
+                ],
+                "publicIds": [{"type": "IANA Registrar ID", "identifier": "9999"}],
+            }
+            for role in ("registrar", "abuse", "technical")
+        ],
+        "events": [
+            {"eventAction": "registration", "eventDate": "2001-01-01T00:00:00Z"},
+            {"eventAction": "expiration", "eventDate": "2030-01-01T00:00:00Z"},
+            {
+                "eventAction": "last update of RDAP database",
+                "eventDate": "2026-01-01T00:00:00Z",
+            },
+        ],
+        "secureDNS": {"delegationSigned": False},
+        "nameservers": [
+            {"objectClassName": "nameserver", "ldhName": f"ns{i}.example.net"}
+            for i in (1, 2)
+        ],
+        "rdapConformance": ["rdap_level_0", "icann_rdap_response_profile_0"],
+        "notices": [
+            {
+                "title": title,
+                "description": [
+                    "This is a mock notice standing in for the terms of service, "
+                    "status code and inaccuracy complaint texts registries attach "
+                    "to every response."
+                ],
+                "links": [{"href": "https://www.icann.org/epp", "type": "text/html"}],
+            }
+            for title in ("Terms of Use", "Status Codes", "Inaccuracy Complaint Form")
+        ],
+    }
+).encode()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Build a latency sampler (seconds) from ``fixed:MS``, ``uniform:LO:HI``,
+    ``exp:MEAN`` or ``lognormal:MEDIAN:SIGMA`` (times in milliseconds).
+    """
+    kind, _, rest = spec.partition(":")
+    try:
+        params = [float(p) for p in rest.split(":")] if rest else []
+        if kind == "fixed" and len(params) == 1:
+            return lambda rng: params[0] / 1000
+        if kind == "uniform" and len(params) == 2:
+            return lambda rng: rng.uniform(params[0], params[1]) / 1000
+        if kind == "exp" and len(params) == 1 and params[0] > 0:
+            return lambda rng: rng.expovariate(1 / params[0]) / 1000
+        if kind == "lognormal" and len(params) == 2:
+            mu = math.log(params[0])
+            return lambda rng: rng.lognormvariate(mu, params[1]) / 1000
+    except ValueError:
+        pass
+    raise ValueError(
+        f"Invalid latency '{spec}'; use fixed:MS, uniform:LO:HI, exp:MEAN "
+        "or lognormal:MEDIAN:SIGMA"
+    )
+
+
+def parse_grid(value: str, cast: Callable = float) -> list:
+    try:
+        return [cast(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid list '{value}'; expected comma-separated numbers")
+
+
+class MockRdapServer:
+    """
+    RDAP stand-in on 127.0.0.1 with a configurable latency distribution.
+
+    Whether a domain is available is a stable hash of its name, so every run sees
+    the same answers; throttling (429 with Retry-After) and dropped connections
+    are injected at random.
+    """
+
+    def __init__(
+        self,
+        latency: Callable[[random.Random], float],
+        available_ratio: float = 0.2,
+        throttle_ratio: float = 0.0,
+        drop_ratio: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.available_ratio = available_ratio
+        self.throttle_ratio = throttle_ratio
+        self.drop_ratio = drop_ratio
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.throttled = 0
+        self.dropped = 0
+        self.body_bytes = 0  # response body bytes sent (HEAD sends none)
+        self.url = None
+        self.h2_url = None
+        self._h2_server = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner = None
+
+    async def respond(
+        self, name: str, method: str = "GET"
+    ) -> Tuple[int, dict, bytes] | None:
+        """Status, headers and body for a lookup of ``name``; None drops it."""
+        self.requests += 1
+        roll = self._rng.random()
+        if roll < self.drop_ratio:
+            self.dropped += 1
+            return None
+        if roll < self.drop_ratio + self.throttle_ratio:
+            self.throttled += 1
+            return 429, {"Retry-After": str(self.retry_after)}, b""
+        await asyncio.sleep(self.latency(self._rng))
+        if zlib.crc32(name.encode()) % 10_000 < self.available_ratio * 10_000:
+            return 404, {}, b""
+        body = _DOMAIN_BODY.replace(b"@NAME@", name.encode())
+        if method != "HEAD":
+            self.body_bytes += len(body)
+        return 200, {"Content-Type": "application/rdap+json"}, body
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        response = await self.respond(request.match_info["name"], request.method)
+        if response is None:
+            request.transport.abort()
+            return web.Response(status=500)
+        status, headers, body = response
+        return web.Response(status=status, headers=headers, body=body)
+
+    async def _start(self, h2c: bool) -> Tuple[str, str | None]:
+        app = web.Application()
+        app.router.add_get("/domain/{name}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0, backlog=1024)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        h2_url = None
+        if h2c:
+            self._h2_server = await asyncio.get_running_loop().create_server(
+                lambda: _H2cProtocol(self), "127.0.0.1", 0, backlog=1024
+            )
+            h2_port = self._h2_server.sockets[0].getsockname()[1]
+            h2_url = f"http://{host}:{h2_port}/"
+        return f"http://{host}:{port}/", h2_url
+
+    def start(self, h2c: bool = False) -> None:
+        self._thread.start()
+        self.url, self.h2_url = asyncio.run_coroutine_threadsafe(
+            self._start(h2c), self._loop
+        ).result()
+
+    def reset(self) -> None:
+        self.requests = self.throttled = self.dropped = self.body_bytes = 0
+
+    def stop(self) -> None:
+        if self._h2_server:
+            self._loop.call_soon_threadsafe(self._h2_server.close)
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class _H2cProtocol(asyncio.Protocol):
+    """One cleartext HTTP/2 connection to the mock; each stream is a lookup."""
+
+    def __init__(self, server: MockRdapServer) -> None:
+        self.server = server
+        self.conn = H2Connection(
+            H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self.transport = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.conn.initiate_connection()
+        transport.write(self.conn.data_to_send())
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            events = self.conn.receive_data(data)
+        except ProtocolError:
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, RequestReceived):
+                headers = dict(event.headers)
+                name = headers.get(":path", "").rsplit("/", 1)[-1]
+                method = headers.get(":method", "GET")
+                asyncio.ensure_future(self._reply(event.stream_id, name, method))
+            elif isinstance(event, ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    async def _reply(self, stream_id: int, name: str, method: str) -> None:
+        response = await self.server.respond(name, method)
+        if self.transport.is_closing():
+            return
+        try:
+            if response is None:
+                # A dropped lookup resets its stream, not the whole connection
+                self.conn.reset_stream(stream_id)
+            else:
+                status, headers, body = response
+                self.conn.send_headers(
+                    stream_id,
+                    [(":status", str(status)), ("content-length", str(len(body)))]
+                    + [(k.lower(), v) for k, v in headers.items()],
+                    end_stream=not body or method == "HEAD",
+                )
+                if body and method != "HEAD":
+                    self.conn.send_data(stream_id, body, end_stream=True)
+        except H2Error:
+            return  # the client already reset the stream
+        self.transport.write(self.conn.data_to_send())
+
+
+def _max_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_bench(args: argparse.Namespace) -> None:
+    # Imported here: main imports this module for the subcommand
+    from .main import _add_check_arguments, run
+    from .transport import TRANSPORTS
+
+    if args.domains < 1:
+        raise ValueError("--domains must be at least 1")
+    for name in ("available_ratio", "throttle_ratio", "drop_ratio"):
+        if not 0 <= getattr(args, name) <= 1:
+            raise ValueError(f"--{name.replace('_', '-')} must be between 0 and 1")
+    concurrencies = parse_grid(args.concurrency, int)
+    rates = parse_grid(args.rate, float)
+    transports = [t.strip() for t in args.transport.split(",") if t.strip()]
+    for transport in transports:
+        if transport not in TRANSPORTS:
+            raise ValueError(
+                f"Unknown transport '{transport}'; choose from {', '.join(TRANSPORTS)}"
+            )
+    h2c = "http2" in transports
+    if h2c and H2Connection is None:
+        raise ValueError(
+            "Benchmarking --transport http2 needs the h2 package "
+            "(pip install 'rchecker[http2]')"
+        )
+    server = MockRdapServer(
+        parse_latency(args.latency),
+        args.available_ratio,
+        args.throttle_ratio,
+        args.drop_ratio,
+        seed=args.seed,
+    )
+    server.start(h2c)
+    h2_note = f", h2c at {server.h2_url}" if h2c else ""
+    print(
+        f"Mock RDAP server at {server.url}{h2_note} (latency {args.latency}, "
+        f"{args.available_ratio:.0%} available, {args.throttle_ratio:.1%} throttled, "
+        f"{args.drop_ratio:.1%} dropped)",
+        file=sys.stderr,
+    )
+
+    header = (
+        f"{'transport':>9} {'concurrency':>11} {'rate':>7} {'lookups':>8} "
+        f"{'requests':>8} {'seconds':>8} {'lookups/s':>10} {'cpu ms/lookup':>13} "
+        f"{'body KB/lookup':>14} {'heap MB':>8}"
+    )
+    print(header)
+    with tempfile.TemporaryDirectory(prefix="rchecker-bench-") as workdir:
+        width = len(str(args.domains - 1))
+        wordlist = os.path.join(workdir, "labels.txt")
+        with open(wordlist, "w", encoding="utf-8") as f:
+            for i in range(args.domains):
+                f.write(f"b{i:0{width}d}\n")
+        label_len = width + 1
+
+        try:
+            for transport, concurrency, rate in itertools.product(
+                transports, concurrencies, rates
+            ):
+                parser = argparse.ArgumentParser()
+                _add_check_arguments(parser, rate, concurrency)
+                check_args = parser.parse_args(
+                    [
+                        "--wordlist",
+                        wordlist,
+                        "--min",
+                        str(label_len),
+                        "--max",
+                        str(label_len),
+                        "--rdap-url",
+                        server.h2_url if transport == "http2" else server.url,
+                        "--transport",
+                        transport,
+                        "--no-progress",
+                        "--output",
+                        os.path.join(workdir, "available.txt"),
+                        "--progress-file",
+                        os.path.join(workdir, "progress.json"),
+                    ]
+                    + shlex.split(args.check_args or "")
+                )
+                check_args.command = "check"
+                server.reset()
+                if args.trace_memory:
+                    tracemalloc.start()
+                started, cpu_started = time.perf_counter(), time.thread_time()
+                # The pipeline's own progress and summary would drown the table
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(
+                    devnull
+                ), contextlib.redirect_stderr(devnull):
+                    asyncio.run(run(check_args))
+                elapsed = time.perf_counter() - started
+                cpu = time.thread_time() - cpu_started
+                heap = "-"
+                if args.trace_memory:
+                    heap = f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f}"
+                    tracemalloc.stop()
+                row = (
+                    f"{transport:>9} {concurrency:>11} {rate or 'off':>7} "
+                    f"{args.domains:>8} {server.requests:>8} {elapsed:>8.2f} "
+                    f"{args.domains / elapsed:>10.1f} "
+                    f"{cpu * 1000 / args.domains:>13.3f} "
+                    f"{server.body_bytes / 1024 / args.domains:>14.2f} {heap:>8}"
+                )
+                print(row, flush=True)
+        finally:
+            server.stop()
+
+    rss = _max_rss_mb()
+    if rss is not None:
+        print(
+            f"Peak process RSS: {rss:.0f} MB (includes the mock server)",
+            file=sys.stderr,
+        )
@@ -0,0 +1,170 @@
+"""
+Bloom filter over an mmap-backed bit array.
+
+A set of 50M FQDNs costs gigabytes as Python strings; a Bloom filter sized for
+a 0.1% false-positive rate needs about 1.8 bytes per entry and never reports a
+member as missing. It is used as the seen-set for label deduplication and, with
+``--checkpoint bloom``, for resume.
+
+The bits live in an anonymous mapping, or in a file when a path is given, so a
+filter can be persisted and reopened without loading it into the Python heap.
+File layout, little-endian::
+
+    magic   8 bytes  b"RCBLOOM1"
+    header  <QIQdQ   bit count, hash count, capacity, error rate, items added
+    bits             ceil(bit count / 8) bytes
+
+Positions come from one 128-bit BLAKE2b digest split into two 64-bit hashes
+(Kirsch-Mitzenmacher double hashing).
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+from typing import List, Tuple
+
+BLOOM_MAGIC = b"RCBLOOM1"
+_HEADER = struct.Struct("<QIQdQ")
+_DATA_OFFSET = len(BLOOM_MAGIC) + _HEADER.size
+
+
+def optimal_size(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """Bit count and hash count for ``capacity`` items at ``error_rate``."""
+    if not 0 < error_rate < 1:
+        raise ValueError("Bloom filter error rate must be between 0 and 1")
+    capacity = max(1, capacity)
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def false_positive_rate(bits: int, hashes: int, items: int) -> float:
+    """Expected false-positive rate once ``items`` have been added."""
+    return (1 - math.exp(-hashes * items / bits)) ** hashes
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings: no false negatives, tunable false positives.
+
+    ``max_bytes`` caps the bit array; when ``capacity`` at ``error_rate`` would
+    need more, the filter uses the cap and ``error_rate`` becomes the higher
+    rate expected at capacity (``capped`` is then True).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float = 0.001,
+        path: str = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.capped = False
+        self.path = path
+        if path and os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            self._load()
+            return
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.bits, self.hashes = optimal_size(self.capacity, error_rate)
+        if max_bytes is not None and (self.bits + 7) // 8 > max_bytes:
+            self.capped = True
+            self.bits = max(8, max_bytes * 8)
+            self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+            self.error_rate = false_positive_rate(
+                self.bits, self.hashes, self.capacity
+            )
+        self.count = 0
+        size = _DATA_OFFSET + (self.bits + 7) // 8
+        if path:
+            self._file = open(path, "w+b")
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._file = None
+            self._map = mmap.mmap(-1, size)
+        self._map[: len(BLOOM_MAGIC)] = BLOOM_MAGIC
+        self._write_header()
+
+    def _load(self) -> None:
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if self._map[: len(BLOOM_MAGIC)] != BLOOM_MAGIC:
+            self._discard()
+            raise ValueError(f"{self.path} is not a Bloom filter file")
+        (
+            self.bits,
+            self.hashes,
+            self.capacity,
+            self.error_rate,
+            self.count,
+        ) = _HEADER.unpack_from(self._map, len(BLOOM_MAGIC))
+        if len(self._map) < _DATA_OFFSET + (self.bits + 7) // 8:
+            self._discard()
+            raise ValueError(f"Bloom filter file {self.path} is truncated")
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._map,
+            len(BLOOM_MAGIC),
+            self.bits,
+            self.hashes,
+            self.capacity,
+            self.error_rate,
+            self.count,
+        )
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        data = self._map
+        for pos in self._positions(key):
+            if not data[_DATA_OFFSET + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, key: str) -> bool:
+        """Insert ``key``; True if it was (probably) present already."""
+        data = self._map
+        present = True
+        for pos in self._positions(key):
+            byte = _DATA_OFFSET + (pos >> 3)
+            mask = 1 << (pos & 7)
+            if not data[byte] & mask:
+                data[byte] |= mask
+                present = False
+        if not present:
+            self.count += 1
+        return present
+
+    def __len__(self) -> int:
+        """Distinct items added (approximate: false positives are not counted)."""
+        return self.count
+
+    def flush(self) -> None:
+        """Write the header and sync a file-backed filter to disk."""
+        self._write_header()
+        if self._file is not None:
+            self._map.flush()
+
+    def close(self) -> None:
+        if not self._map.closed:
+            if self._file is not None:
+                self.flush()
+            self._map.close()
+        self._discard()
+
+    def _discard(self) -> None:
+        """Release the mapping and file without writing anything."""
+        if not self._map.closed:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
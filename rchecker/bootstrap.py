@@ -0,0 +1,136 @@
+"""
+IANA RDAP bootstrap resolution (RFC 9224).
+
+Maps each TLD to the base URL of its authoritative RDAP server so lookups go
+straight to the registry instead of bouncing through rdap.org's redirect. The
+registry file is cached on disk and refreshed once it is older than the TTL; a
+bundled snapshot is used when neither the cache nor the network is available.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict
+
+import aiohttp
+
+from .checkpoint import atomic_write_json
+
+IANA_BOOTSTRAP_URL = "https://data.iana.org/rdap/dns.json"
+FALLBACK_RDAP_URL = "https://rdap.org/"
+BUNDLED_BOOTSTRAP_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "rdap_dns.json"
+)
+
+
+def default_cache_path() -> str:
+    """Location of the cached bootstrap registry (honours XDG_CACHE_HOME)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "rchecker", "rdap_dns.json")
+
+
+def _normalize_base(url: str) -> str:
+    return url if url.endswith("/") else url + "/"
+
+
+class RdapBootstrap:
+    """TLD to RDAP base URL mapping built from an IANA bootstrap registry."""
+
+    def __init__(
+        self, services: Dict[str, str] = None, fallback: str = FALLBACK_RDAP_URL
+    ) -> None:
+        self.services = {
+            tld.lower(): _normalize_base(url) for tld, url in (services or {}).items()
+        }
+        self.fallback = _normalize_base(fallback)
+
+    @classmethod
+    def from_registry(
+        cls, data: dict, fallback: str = FALLBACK_RDAP_URL
+    ) -> "RdapBootstrap":
+        """Build from the parsed ``dns.json`` document."""
+        services = {}
+        for entry in data.get("services", []):
+            if len(entry) < 2 or not entry[1]:
+                continue
+            tlds, urls = entry[0], entry[1]
+            # Prefer HTTPS when a service lists several transports
+            url = next((u for u in urls if u.startswith("https://")), urls[0])
+            for tld in tlds:
+                services[tld] = url
+        return cls(services, fallback)
+
+    @classmethod
+    def from_file(cls, path: str, fallback: str = FALLBACK_RDAP_URL) -> "RdapBootstrap":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            raise ValueError(f"Error reading RDAP bootstrap file {path}: {e}")
+        return cls.from_registry(data, fallback)
+
+    @classmethod
+    def fixed(cls, base_url: str) -> "RdapBootstrap":
+        """Send every lookup to ``base_url`` (e.g. rdap.org or a local test server)."""
+        return cls({}, fallback=base_url)
+
+    def base_url(self, tld: str) -> str:
+        return self.services.get(tld.lower(), self.fallback)
+
+    def domain_url(self, fqdn: str) -> str:
+        tld = fqdn.rsplit(".", 1)[-1]
+        return f"{self.base_url(tld)}domain/{fqdn}"
+
+
+async def load_bootstrap(
+    session: aiohttp.ClientSession,
+    cache_path: str = None,
+    ttl: float = 86400.0,
+    timeout: float = 10.0,
+) -> RdapBootstrap:
+    """
+    Return the bootstrap registry, refreshing the on-disk cache when stale.
+
+    Falls back to a stale cache, then to the bundled snapshot, if IANA cannot be
+    reached.
+    """
+    cache_path = cache_path or default_cache_path()
+    cache_age = None
+    if os.path.exists(cache_path):
+        cache_age = time.time() - os.path.getmtime(cache_path)
+        if cache_age < ttl:
+            try:
+                return RdapBootstrap.from_file(cache_path)
+            except ValueError as e:
+                print(f"Warning: {e}; refreshing", file=sys.stderr)
+                cache_age = None
+
+    try:
+        async with session.get(
+            IANA_BOOTSTRAP_URL, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as resp:
+            if resp.status != 200:
+                raise ValueError(f"HTTP {resp.status}")
+            data = await resp.json(content_type=None)
+        bootstrap = RdapBootstrap.from_registry(data)
+        if not bootstrap.services:
+            raise ValueError("registry lists no services")
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            atomic_write_json(cache_path, data)
+        except OSError as e:
+            print(f"Warning: could not cache RDAP bootstrap: {e}", file=sys.stderr)
+        return bootstrap
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"Warning: could not refresh RDAP bootstrap: {e}", file=sys.stderr)
+
+    if cache_age is not None:
+        try:
+            return RdapBootstrap.from_file(cache_path)
+        except ValueError:
+            pass
+    return RdapBootstrap.from_file(BUNDLED_BOOTSTRAP_FILE)
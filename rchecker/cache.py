@@ -0,0 +1,115 @@
+"""
+Persistent SQLite cache of lookup results.
+
+Repeat scans over overlapping wordlists and patterns mostly hit domains whose
+status has not changed in months. Each FQDN's last outcome is stored with the
+time it was checked (and, for registered domains, the expiry date from RDAP),
+so a later run only looks up entries that are unknown or stale.
+"""
+
+import sqlite3
+import sys
+import time
+from typing import Callable, Tuple
+
+from .result import AVAILABLE, ERROR, REGISTERED, LookupResult
+
+HOUR = 3600.0
+
+
+class ResultCache:
+    """FQDN-keyed result store with separate TTLs per outcome."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_registered: float = 720 * HOUR,
+        ttl_available: float = 24 * HOUR,
+        ttl_error: float = 0.0,
+        commit_every: int = 1000,
+        commit_interval: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.ttls = {
+            REGISTERED: ttl_registered,
+            AVAILABLE: ttl_available,
+            ERROR: ttl_error,
+        }
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._clock = clock
+        self._pending = []
+        self._last_commit = time.monotonic()
+        self.hits = 0
+        try:
+            # Shard processes may share one cache file; wait for their writes
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " fqdn TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " checked_at REAL NOT NULL,"
+                " expires_at REAL"
+                ") WITHOUT ROWID"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            raise ValueError(f"Error opening result cache {path}: {e}")
+
+    def get(self, fqdn: str) -> Tuple[str, float, float | None] | None:
+        """Return ``(status, checked_at, expires_at)`` or None if never seen."""
+        return self._db.execute(
+            "SELECT status, checked_at, expires_at FROM results WHERE fqdn = ?",
+            (fqdn,),
+        ).fetchone()
+
+    def lookup_fresh(self, fqdn: str) -> str | None:
+        """Cached status if it is still within its TTL, otherwise None."""
+        row = self.get(fqdn)
+        if row is None:
+            return None
+        status, checked_at, expires_at = row
+        now = self._clock()
+        if now - checked_at >= self.ttls.get(status, 0.0):
+            return None
+        # A registration may lapse; re-check once its expiry date has passed
+        if status == REGISTERED and expires_at is not None and now >= expires_at:
+            return None
+        self.hits += 1
+        return status
+
+    def record(self, result: LookupResult) -> None:
+        """Queue a result for storage; errors are only kept when they have a TTL."""
+        status = result.outcome
+        if self.ttls[status] <= 0:
+            return
+        self._pending.append(
+            (result.fqdn, status, result.checked_at, result.expires_at)
+        )
+        if (
+            len(self._pending) >= self.commit_every
+            or time.monotonic() - self._last_commit >= self.commit_interval
+        ):
+            self.commit()
+
+    def commit(self) -> None:
+        self._last_commit = time.monotonic()
+        if not self._pending:
+            return
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results (fqdn, status, checked_at, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                self._pending,
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing result cache {self.path}: {e}", file=sys.stderr)
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.commit()
+        self._db.close()
@@ -0,0 +1,594 @@
+"""
+Embeddable checker: RDAP lookups as an async stream of LookupResults.
+
+Checker owns everything a scan needs besides its inputs and outputs: the HTTP
+session and transport, the RDAP bootstrap, the per-host rate limiter, the retry
+queue, and optionally a DNS pre-filter, a result cache and a checkpoint::
+
+    async with Checker(rate=10, concurrency=20) as checker:
+        async for result in checker.check(["example.com", "example.net"]):
+            print(result.fqdn, result.available)
+
+``check`` takes any iterable or async iterable of FQDNs. Each registry host
+gets a bounded queue and ``concurrency`` workers, and finished lookups are
+handed over through another bounded queue, so a consumer that falls behind
+holds the workers and then the input back instead of buffering results.
+
+With a checkpoint, domains it already holds are skipped and every outcome is
+recorded once the consumer has taken it, so anything written by the consumer
+before the next result is requested survives an interruption.
+"""
+
+import asyncio
+import ssl
+import sys
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Set
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .bootstrap import RdapBootstrap, load_bootstrap
+from .cache import ResultCache
+from .dns import DnsResolver
+from .metrics import Metrics
+from .ratelimit import HostRateLimiter, parse_retry_after
+from .rdapjson import RDAP_FIELDS
+from .result import (
+    AVAILABLE,
+    REGISTERED,
+    LookupResult,
+    parse_rdap_expiration,
+    parse_rdap_status,
+)
+from .retry import RETRY_CLASSES, RetryPolicy, RetryQueue
+from .transport import (
+    TRANSPORTS,
+    USER_AGENT,
+    AiohttpTransport,
+    Http2Transport,
+    Transport,
+    TransportError,
+    warm_up,
+)
+
+
+async def lookup_domain(
+    transport: Transport | aiohttp.ClientSession,
+    fqdn: str,
+    timeout: float,
+    max_retries: int = 2,
+    url: str = None,
+    limiter: HostRateLimiter = None,
+    want_details: bool = False,
+    metrics: Metrics = None,
+    policy: RetryPolicy = None,
+    slots: asyncio.Semaphore = None,
+) -> LookupResult:
+    """
+    Query RDAP for ``fqdn``; with want_details, parse the expiry of registered domains.
+
+    Failures are retried in place per ``policy`` (by default every retryable
+    failure, up to max_retries, with jittered exponential backoff). A plain
+    aiohttp session is accepted in place of a transport. Each request holds
+    one of ``slots``, if given, once the rate limiter has let it through.
+    """
+    if isinstance(transport, aiohttp.ClientSession):
+        transport = AiohttpTransport(transport)
+    if policy is None:
+        policy = RetryPolicy(max_retries)
+    if url is None:
+        url = f"https://rdap.org/domain/{fqdn}"
+    host = urlsplit(url).hostname or ""
+    started = time.monotonic()
+    waited = [0.0]  # time spent queued on the rate limiter, excluded from latency
+    backoff = 0.0
+    for attempt in range(policy.max_retries + 1):
+        result = await _query_rdap(
+            transport, fqdn, timeout, url, host, limiter, want_details, waited, slots
+        )
+        if not policy.should_retry(result, attempt):
+            break
+        delay = policy.delay(attempt, result.retry_after)
+        backoff += delay
+        await asyncio.sleep(delay)
+    result.attempts = attempt + 1
+    result.latency = time.monotonic() - started - waited[0] - backoff
+    result.limiter_wait = waited[0]
+    if metrics:
+        metrics.observe(result)
+    return result
+
+
+async def _query_rdap(
+    transport: Transport,
+    fqdn: str,
+    timeout: float,
+    url: str,
+    host: str,
+    limiter: HostRateLimiter,
+    want_details: bool,
+    waited: List[float],
+    slots: asyncio.Semaphore = None,
+) -> LookupResult:
+    """A single RDAP request; errors come back as a result, never raised."""
+    if limiter:
+        wait_started = time.monotonic()
+        await limiter.wait(host)
+        waited[0] += time.monotonic() - wait_started
+    args = (transport, fqdn, timeout, url, host, limiter, want_details)
+    if slots is None:
+        return await _fetch_rdap(*args)
+    async with slots:
+        return await _fetch_rdap(*args)
+
+
+async def _fetch_rdap(
+    transport: Transport,
+    fqdn: str,
+    timeout: float,
+    url: str,
+    host: str,
+    limiter: HostRateLimiter,
+    want_details: bool,
+) -> LookupResult:
+    """Send the request of ``_query_rdap`` and turn the response into a result."""
+    try:
+        resp = await transport.fetch(url, timeout, RDAP_FIELDS if want_details else ())
+        retry_after = resp.headers.get("Retry-After")
+        if limiter:
+            # Throttling also holds this host back on the limiter
+            limiter.feedback(host, resp.status, retry_after)
+        if resp.status == 404:
+            return LookupResult(fqdn, True, resp.status)
+        if resp.status == 200:
+            result = LookupResult(fqdn, False, resp.status)
+            if resp.fields:
+                try:
+                    result.expires_at = parse_rdap_expiration(resp.fields)
+                    result.rdap_status = parse_rdap_status(resp.fields)
+                except (ValueError, AttributeError, TypeError):
+                    pass
+            return result
+        result = LookupResult(fqdn, None, resp.status, error=f"HTTP {resp.status}")
+        result.retry_after = parse_retry_after(retry_after)
+        return result
+    except asyncio.TimeoutError:
+        return LookupResult(fqdn, None, error="timeout")
+    except ssl.SSLError as exc:
+        return LookupResult(fqdn, None, error=f"ssl: {exc}")
+    except TransportError as exc:
+        return LookupResult(fqdn, None, error=f"request: {exc}")
+    except Exception as exc:
+        return LookupResult(fqdn, None, error=f"unexpected: {exc}")
+
+
+async def check_domain(
+    session: aiohttp.ClientSession,
+    fqdn: str,
+    timeout: float,
+    max_retries: int = 2,
+    url: str = None,
+    limiter: HostRateLimiter = None,
+) -> bool | None:
+    """True if available, False if registered, None if the lookup failed."""
+    result = await lookup_domain(session, fqdn, timeout, max_retries, url, limiter)
+    return result.available
+
+
+class Checker:
+    """
+    Looks domains up concurrently and streams their results.
+
+    Use it as an async context manager, or call ``open`` and ``close``. A
+    ``session`` passed in is used as is and left open; the checkpoint and
+    cache passed in belong to the checker and are closed with it.
+
+    Several ``check`` calls may run at once. They share the session, rate
+    limits and checkpoint, and each has its own workers: a pool per registry
+    host, with at most ``concurrency`` requests in flight across all of them. A caller that stops
+    iterating early should close the iterator (``aclose`` or
+    ``contextlib.aclosing``) so its lookups are cancelled straight away.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 50,
+        rate: float | None = None,
+        burst: int = 1,
+        adaptive_rate: bool = False,
+        max_rate: float | None = None,
+        timeout: float = 10.0,
+        retries: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+        retry_on: Iterable[str] = RETRY_CLASSES,
+        final_retry_pass: bool = False,
+        rdap_url: str = None,
+        bootstrap: RdapBootstrap = None,
+        bootstrap_cache: str = None,
+        bootstrap_ttl: float = 24.0,
+        transport: str = "aiohttp",
+        max_streams: int = 100,
+        use_head: bool = True,
+        details: bool = False,
+        cache: ResultCache = None,
+        checkpoint=None,
+        resolver: DnsResolver = None,
+        dns_concurrency: int = 50,
+        metrics: Metrics = None,
+        session: aiohttp.ClientSession = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport '{transport}'")
+        if adaptive_rate and not rate:
+            raise ValueError("adaptive_rate needs a starting rate")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        if resolver and dns_concurrency < 1:
+            raise ValueError("dns_concurrency must be at least 1")
+        if retries < 0:
+            raise ValueError("retries cannot be negative")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.final_retry_pass = final_retry_pass
+        self.policy = RetryPolicy(retries, retry_base_delay, retry_max_delay, retry_on)
+        self.limiter = HostRateLimiter(
+            rate if rate and rate > 0 else None,
+            adaptive=adaptive_rate,
+            max_rate=max_rate if max_rate and max_rate > 0 else None,
+            burst=burst,
+        )
+        self.rdap_url = rdap_url
+        self.bootstrap = bootstrap
+        self.bootstrap_cache = bootstrap_cache
+        self.bootstrap_ttl = bootstrap_ttl
+        self.use_head = use_head
+        # Expiry dates feed cache freshness as well as whatever the caller wants
+        self.details = details or cache is not None
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.resolver = resolver
+        self.dns_concurrency = dns_concurrency
+        self.metrics = metrics or Metrics()
+        self.transport: Transport | None = None
+        # Opens no connections until the first request
+        self._http2 = (
+            Http2Transport(max_streams, use_head) if transport == "http2" else None
+        )
+        self._session = session
+        self._owns_session = session is None
+        self._queue_size = max(concurrency * 4, 64)
+        self._scans: Set["_Scan"] = set()
+        self._retried = 0  # by scans that have ended
+        self.metrics.add_collector(
+            "rchecker_queue_depth",
+            "gauge",
+            "Domains waiting in each registry queue.",
+            self._queue_depths,
+        )
+        self.metrics.add_collector(
+            "rchecker_rate_limit",
+            "gauge",
+            "Current rate cap per registry host (0 = unlimited).",
+            lambda: {
+                (("host", host),): rate or 0
+                for host, rate in self.limiter.effective_rates().items()
+            },
+        )
+
+    async def __aenter__(self) -> "Checker":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Create the session and transport and load the RDAP bootstrap."""
+        if self._session is None:
+            # Lenient TLS, as registries' certificates are not always in order
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+            # Workers bound the total; each registry host keeps its own keep-alive pool
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.concurrency,
+                ssl=ssl_context,
+                ttl_dns_cache=300,  # DNS cache for 5 minutes
+                use_dns_cache=True,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        self.transport = self._http2 or AiohttpTransport(self._session, self.use_head)
+        if self.bootstrap is None:
+            if self.rdap_url:
+                self.bootstrap = RdapBootstrap.fixed(self.rdap_url)
+            else:
+                self.bootstrap = await load_bootstrap(
+                    self._session, self.bootstrap_cache, self.bootstrap_ttl * 3600
+                )
+        if self.resolver:
+            await self.resolver.start()
+
+    async def close(self) -> None:
+        """Close connections and flush the checkpoint and cache."""
+        try:
+            if self._http2:
+                await self._http2.close()
+            if self._owns_session and self._session is not None:
+                await self._session.close()
+                self._session = None
+        finally:
+            if self.resolver:
+                self.resolver.close()
+            if self.checkpoint:
+                self.checkpoint.close()
+            if self.cache:
+                self.cache.close()
+
+    def registry(self, tld: str) -> str:
+        """Host of the RDAP service for ``tld``; lookups are queued per host."""
+        return urlsplit(self.bootstrap.base_url(tld)).hostname or ""
+
+    async def warm_up(self, tlds: Iterable[str], per_host: int) -> None:
+        """Open ``per_host`` connections to each registry serving ``tlds``."""
+        if per_host < 0:
+            raise ValueError("per_host cannot be negative")
+        # RDAP's help endpoint is cheap and needs no domain
+        urls = dict.fromkeys(self.bootstrap.base_url(tld) + "help" for tld in tlds)
+        await warm_up(self.transport, urls, per_host, self.timeout)
+
+    @property
+    def retried(self) -> int:
+        """Failed requests retried after backoff so far."""
+        return self._retried + sum(scan.retries.scheduled for scan in self._scans)
+
+    def stop(self) -> None:
+        """
+        Stop taking domains in every running check. Lookups in flight still
+        finish and are yielded; queued domains are dropped unrecorded, so a
+        checkpoint resumes them.
+        """
+        for scan in self._scans:
+            scan.stop()
+
+    def _queue_depths(self) -> Dict[tuple, int]:
+        depths: Dict[tuple, int] = {}
+        for scan in self._scans:
+            for host, queue in scan.queues.items():
+                key = (("host", host),)
+                depths[key] = depths.get(key, 0) + queue.qsize()
+        return depths
+
+    async def check(
+        self, domains: Iterable[str] | AsyncIterable[str]
+    ) -> AsyncIterator[LookupResult]:
+        """Look up every domain and yield its result as soon as it is final."""
+        if self.transport is None:
+            raise RuntimeError("Checker is not open; use 'async with Checker(...)'")
+        scan = _Scan(self)
+        self._scans.add(scan)
+        scan.start(domains)
+        checkpoint = self.checkpoint
+        results = scan.results
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                if checkpoint:
+                    if item.available is None:
+                        await checkpoint.mark_failed(item.fqdn)
+                    else:
+                        await checkpoint.mark_checked(item.fqdn)
+        finally:
+            self._scans.discard(scan)
+            self._retried += scan.retries.scheduled
+            await scan.cancel()
+
+
+class _Scan:
+    """The queues and tasks of one ``Checker.check`` call."""
+
+    def __init__(self, checker: Checker) -> None:
+        self.checker = checker
+        size = checker._queue_size
+        self.results: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.queues: Dict[str, asyncio.Queue] = {}  # one per registry host
+        self._tld_queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        # Shared by every registry's workers: caps the requests in flight
+        self._slots = asyncio.Semaphore(checker.concurrency)
+        self._stages: List[asyncio.Task] = []
+        self._feeding: asyncio.Task | None = None
+        self._running: asyncio.Task | None = None
+        self._stopping = False
+        # Failed lookups back off here instead of holding a worker
+        self.retries = RetryQueue(checker.policy, self._dispatch, checker.final_retry_pass)
+        self._pump: asyncio.Task | None = None
+
+    def start(self, domains: Iterable[str] | AsyncIterable[str]) -> None:
+        self._pump = asyncio.create_task(self.retries.run())
+        self._running = asyncio.create_task(self._run(domains))
+
+    def stop(self) -> None:
+        self._stopping = True
+        for task in [self._feeding, self._pump, *self._stages]:
+            if task is not None:
+                task.cancel()
+
+    async def cancel(self) -> None:
+        tasks = [self._running, self._feeding, self._pump]
+        tasks = [t for t in tasks + self._stages + self._workers if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, domains: Iterable[str] | AsyncIterable[str]) -> None:
+        """Feed the domains, wait for every outcome, then end the result stream."""
+        try:
+            self._feeding = asyncio.create_task(self._feed(domains))
+            if self._stopping:
+                self._feeding.cancel()  # stopped before feeding began
+            await asyncio.wait({self._feeding})
+            if self._stopping:
+                if not self._feeding.cancelled():
+                    self._feeding.exception()  # retrieved; the stop wins
+                for queue in self.queues.values():
+                    while not queue.empty():
+                        queue.get_nowait()
+                        queue.task_done()
+            else:
+                self._feeding.result()
+            for queue in self.queues.values():
+                for _ in range(self.checker.concurrency):
+                    await queue.put(None)
+            await asyncio.gather(*self._workers)
+        except Exception as exc:
+            await self.results.put(exc)
+            return
+        await self.results.put(None)
+
+    async def _feed(self, domains: Iterable[str] | AsyncIterable[str]) -> None:
+        """Queue every domain still to check, then wait until none is pending."""
+        checker = self.checker
+        put = self._dispatch
+        if checker.resolver:
+            # The pre-filter sits between the input and the registry queues
+            inbox = asyncio.Queue(maxsize=max(checker.dns_concurrency * 4, 64))
+            self._stages = [
+                asyncio.create_task(self._prefilter(inbox))
+                for _ in range(checker.dns_concurrency)
+            ]
+            put = inbox.put
+
+        is_checked = getattr(checker.checkpoint, "is_checked", None)
+        cache = checker.cache
+        results = self.results
+
+        async def feed_one(fqdn: str) -> None:
+            if is_checked and is_checked(fqdn):
+                return
+            if cache:
+                # Answer from the result cache when the stored outcome is still fresh
+                cached = cache.lookup_fresh(fqdn)
+                if cached is not None:
+                    available = {AVAILABLE: True, REGISTERED: False}.get(cached)
+                    await results.put(LookupResult(fqdn, available, source="cache"))
+                    return
+            # Suspends while the queue is full, so the input never runs ahead of lookups
+            await put(fqdn)
+
+        if isinstance(domains, AsyncIterable):
+            async for fqdn in domains:
+                await feed_one(fqdn)
+        else:
+            for fqdn in domains:
+                await feed_one(fqdn)
+
+        if checker.resolver:
+            for _ in self._stages:
+                await inbox.put(None)
+            await asyncio.gather(*self._stages)
+        retries = self.retries
+        await retries.join(self.queues.values())
+        final_pass = retries.start_final_pass()
+        if final_pass:
+            print(
+                f"Retrying {len(final_pass)} failed lookups in a final pass",
+                file=sys.stderr,
+            )
+            for fqdn in final_pass:
+                await self._dispatch(fqdn)
+            await retries.join(self.queues.values())
+
+    async def _dispatch(self, fqdn: str) -> None:
+        """Queue ``fqdn`` for its registry, starting that registry's workers."""
+        tld = fqdn.rpartition(".")[2]
+        queue = self._tld_queues.get(tld)
+        if queue is None:
+            host = self.checker.registry(tld)
+            queue = self.queues.get(host)
+            if queue is None:
+                # One bounded queue and worker pool per registry host, so every
+                # registry's limiter is kept busy at the same time; the shared
+                # slots keep the total in flight at the concurrency
+                queue = asyncio.Queue(maxsize=self.checker._queue_size)
+                self.queues[host] = queue
+                self._workers.extend(
+                    asyncio.create_task(self._worker(queue))
+                    for _ in range(self.checker.concurrency)
+                )
+            self._tld_queues[tld] = queue
+        await queue.put(fqdn)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        """
+        Look up domains from ``queue`` until a stop sentinel arrives.
+
+        Each request is a single attempt: a failure worth retrying is handed to
+        the retry queue to back off there while this worker moves on. Metrics
+        are recorded once per domain, when its outcome is final.
+        """
+        checker = self.checker
+        bootstrap = checker.bootstrap
+        retries = self.retries
+        results = self.results
+        while True:
+            try:
+                fqdn = await queue.get()
+            except asyncio.CancelledError:
+                return
+            if fqdn is None:
+                queue.task_done()
+                break
+            lookup = await lookup_domain(
+                checker.transport,
+                fqdn,
+                checker.timeout,
+                0,
+                bootstrap.domain_url(fqdn),
+                checker.limiter,
+                checker.details,
+                slots=self._slots,
+            )
+            if retries.schedule(lookup) or retries.defer(lookup):
+                queue.task_done()
+                continue
+            retries.finish(lookup)
+            checker.metrics.observe(lookup)
+            if checker.cache:
+                checker.cache.record(lookup)
+            await results.put(lookup)
+            queue.task_done()
+
+    async def _prefilter(self, inbox: asyncio.Queue) -> None:
+        """Report delegated domains as registered; pass everything else on to RDAP."""
+        checker = self.checker
+        while True:
+            fqdn = await inbox.get()
+            if fqdn is None:
+                inbox.task_done()
+                break
+            if await checker.resolver.has_delegation(fqdn):
+                lookup = LookupResult(fqdn, False, source="dns")
+                if checker.cache:
+                    checker.cache.record(lookup)
+                await self.results.put(lookup)
+            else:
+                # NXDOMAIN or no conclusive answer: RDAP has the final say
+                await self._dispatch(fqdn)
+            inbox.task_done()
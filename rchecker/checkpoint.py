@@ -0,0 +1,523 @@
+"""
+Checkpoint backends used for --resume.
+
+ProgressManager records finished domains through CheckpointJournal, which keeps two
+files next to each other:
+
+* ``<progress_file>`` - a JSON snapshot (``{"checked_domains": [...],
+  "failed_domains": [...]}``), replaced atomically on compaction. Snapshots from
+  older releases have no failed list and load as before.
+* ``<progress_file>.journal`` - one record per line, appended as lookups finish.
+
+Replaying the snapshot followed by the journal reconstructs the checked set and the
+set of domains whose last lookup failed; those are not checked, so a resumed scan
+queries them again. A torn final line (no trailing newline) is ignored, so a crash
+can at worst lose the last unflushed batch.
+
+Pattern-mode scans can instead use KeyspaceProgress, which stores a watermark and
+sparse index intervals rather than one entry per domain. BloomProgress keeps the
+checked set as a Bloom filter for scans too large to hold as strings.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from .bloom import BloomFilter
+from .keyspace import IntervalSet
+
+# Record types written to the journal, one per line as "<op>\t<key>".
+OP_CHECKED = "c"
+OP_FAILED = "e"
+
+
+def atomic_write_json(path: str, data) -> None:
+    """Write JSON to ``path`` via a temporary file and rename."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def _fsync_dir(path: str) -> None:
+    """Persist a rename by syncing the containing directory (best effort)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class CheckpointJournal:
+    """Line-oriented append-only log with batched fsync and periodic compaction."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = 1000,
+        flush_interval: float = 1.0,
+        compact_min: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.compact_min = compact_min
+        self._clock = clock
+        self._buffer: list[str] = []
+        self._handle = None
+        self._last_flush = clock()
+        self._snapshot_size = 0
+        self._journal_records = 0
+
+    def replay(self) -> Tuple[Set[str], Set[str]]:
+        """Rebuild the checked and failed sets from the snapshot plus the journal."""
+        checked: Set[str] = set()
+        failed: Set[str] = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            checked.update(data.get("checked_domains", []))
+            failed.update(data.get("failed_domains", []))
+        self._snapshot_size = len(checked) + len(failed)
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        # Torn write from a crash mid-append; drop it
+                        break
+                    op, _, key = line.rstrip("\n").partition("\t")
+                    if op == OP_CHECKED and key:
+                        checked.add(key)
+                        failed.discard(key)
+                    elif op == OP_FAILED and key:
+                        failed.add(key)
+                    self._journal_records += 1
+        return checked, failed
+
+    def append(self, key: str, op: str = OP_CHECKED) -> None:
+        """Queue a record; flushes once the batch size or interval is reached."""
+        self._buffer.append(f"{op}\t{key}\n")
+        if (
+            len(self._buffer) >= self.flush_every
+            or self._clock() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records and fsync the journal."""
+        self._last_flush = self._clock()
+        if not self._buffer:
+            return
+        if self._handle is None:
+            self._handle = open(self.journal_path, "a", encoding="utf-8")
+        self._handle.write("".join(self._buffer))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._journal_records += len(self._buffer)
+        self._buffer.clear()
+
+    def should_compact(self) -> bool:
+        """Compact once the journal outgrows the snapshot, keeping appends amortized O(1)."""
+        pending = self._journal_records + len(self._buffer)
+        return pending >= max(self.compact_min, self._snapshot_size)
+
+    def compact(self, checked: Iterable[str], failed: Iterable[str] = ()) -> None:
+        """Fold the journal into a fresh snapshot and truncate it."""
+        self.flush()
+        keys = list(checked)
+        failed_keys = list(failed)
+        atomic_write_json(
+            self.path, {"checked_domains": keys, "failed_domains": failed_keys}
+        )
+        # The snapshot already holds every journal record, so a crash before the
+        # truncate below only replays duplicates.
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            os.fsync(f.fileno())
+        self._snapshot_size = len(keys) + len(failed_keys)
+        self._journal_records = 0
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def remove(self) -> None:
+        """Delete the snapshot and journal files."""
+        self._buffer.clear()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Error removing progress file {path}: {e}", file=sys.stderr)
+
+
+def detect_checkpoint_format(path: str) -> str | None:
+    """Return "keyspace", "bloom", "domains" or None if no checkpoint exists at ``path``."""
+    if os.path.exists(f"{path}.journal"):
+        return "domains"
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return "domains"
+    if isinstance(data, dict) and data.get("format") in (
+        KeyspaceProgress.FORMAT,
+        BloomProgress.FORMAT,
+    ):
+        return data["format"]
+    return "domains"
+
+
+class KeyspaceProgress:
+    """
+    Resume state for an ordered keyspace enumeration.
+
+    Completed work is a watermark (``next_index``: every index below it has been
+    dispatched) plus a sparse interval set of indices below the watermark that
+    still need a lookup, i.e. ones in flight when the state was saved or ones
+    whose lookup failed. Resuming re-queues the sparse indices, then seeks straight
+    to the watermark instead of regenerating and filtering everything before it.
+    The failed indices are also saved on their own (``failed``), so a resume can
+    report how many it retries; older state files without them load as before.
+    """
+
+    FORMAT = "keyspace"
+
+    def __init__(
+        self,
+        progress_file: str,
+        fingerprint: dict,
+        save_every: int = 1000,
+        save_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.progress_file = progress_file
+        self.fingerprint = fingerprint
+        self.save_every = max(1, save_every)
+        self.save_interval = save_interval
+        self._clock = clock
+        self.next_index = 0
+        self._resume = IntervalSet()
+        self._resume_next = 0
+        self._in_flight: Dict[str, int] = {}
+        self._failed = IntervalSet()
+        self._failed_before = IntervalSet()
+        self._unsaved = 0
+        self._last_save = clock()
+
+    def load(self, strict: bool = False) -> None:
+        """Load saved state; a checkpoint for a different keyspace is ignored unless strict."""
+        if not os.path.exists(self.progress_file):
+            return
+        with open(self.progress_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("fingerprint") != self.fingerprint:
+            message = (
+                f"Progress file {self.progress_file} belongs to a different scan "
+                f"({data.get('fingerprint')})"
+            )
+            if strict:
+                raise ValueError(message + "; remove it or choose another --progress-file")
+            print(f"Warning: {message}; starting from scratch", file=sys.stderr)
+            return
+        self.next_index = int(data.get("next_index", 0))
+        self._resume = IntervalSet(data.get("pending", []))
+        self._failed_before = IntervalSet(data.get("failed", []))
+
+    @property
+    def failed_count(self) -> int:
+        """Lookups that failed in the run being resumed; they are re-queued."""
+        return len(self._failed_before)
+
+    def completed_count(
+        self, width: int = 1, shard_index: int = 0, shard_count: int = 1
+    ) -> int:
+        """Number of this shard's candidates known to be done."""
+        label, partial = divmod(self.next_index, width)
+        owned = len(range(shard_index, label, shard_count)) * width
+        if label % shard_count == shard_index:
+            owned += partial
+        return owned - len(self._resume)
+
+    def iter_domains(
+        self, keyspace, tlds: List[str], shard_index: int = 0, shard_count: int = 1
+    ) -> Iterator[str]:
+        """
+        Yield FQDNs still to check: pending indices first, then from the watermark.
+
+        Candidate ``i`` is label ``i // len(tlds)`` under TLD ``i % len(tlds)``;
+        shards own whole labels so each label's TLDs stay together.
+        """
+        if isinstance(tlds, str):
+            tlds = [tlds]
+        width = len(tlds)
+        for index in self._resume:
+            label_index, tld_index = divmod(index, width)
+            fqdn = f"{keyspace.label_at(label_index)}.{tlds[tld_index]}"
+            self._in_flight[fqdn] = index
+            self._resume_next = index + 1
+            yield fqdn
+
+        start_label, first_tld = divmod(self.next_index, width)
+        if (start_label - shard_index) % shard_count:
+            # Skip ahead to the next label owned by this shard
+            start_label += (shard_index - start_label) % shard_count
+            first_tld = 0
+        for label_index, label in keyspace.iter_from(start_label, shard_count):
+            for tld_index in range(first_tld, width):
+                index = label_index * width + tld_index
+                fqdn = f"{label}.{tlds[tld_index]}"
+                self._in_flight[fqdn] = index
+                self.next_index = index + 1
+                yield fqdn
+            first_tld = 0
+
+    async def mark_checked(self, domain: str) -> None:
+        self._in_flight.pop(domain, None)
+        self._record()
+
+    async def mark_failed(self, domain: str) -> None:
+        index = self._in_flight.pop(domain, None)
+        if index is not None:
+            self._failed.add(index)
+        self._record()
+
+    def _record(self) -> None:
+        self._unsaved += 1
+        if (
+            self._unsaved >= self.save_every
+            or self._clock() - self._last_save >= self.save_interval
+        ):
+            self.flush()
+
+    def _pending_intervals(self) -> list:
+        pending = self._resume.intervals(start_at=self._resume_next)
+        pending += self._failed.intervals()
+        pending += IntervalSet.from_values(self._in_flight.values()).intervals()
+        return IntervalSet(pending).intervals()
+
+    def _failed_intervals(self) -> list:
+        # Earlier failures not yet re-dispatched still count as failed
+        failed = self._failed_before.intervals(start_at=self._resume_next)
+        failed += self._failed.intervals()
+        return IntervalSet(failed).intervals()
+
+    def flush(self) -> None:
+        """Atomically rewrite the (small) state file."""
+        self._unsaved = 0
+        self._last_save = self._clock()
+        try:
+            atomic_write_json(
+                self.progress_file,
+                {
+                    "format": self.FORMAT,
+                    "fingerprint": self.fingerprint,
+                    "next_index": self.next_index,
+                    "pending": self._pending_intervals(),
+                    "failed": self._failed_intervals(),
+                },
+            )
+        except IOError as e:
+            print(
+                f"Error saving progress to {self.progress_file}: {e}", file=sys.stderr
+            )
+
+    def close(self) -> None:
+        self.flush()
+
+    def cleanup(self) -> None:
+        """Remove the state file after completion"""
+        if os.path.exists(self.progress_file):
+            try:
+                os.remove(self.progress_file)
+            except OSError as e:
+                print(
+                    f"Error removing progress file {self.progress_file}: {e}",
+                    file=sys.stderr,
+                )
+
+
+class BloomProgress:
+    """
+    Resume state with the checked set held in a persistent Bloom filter.
+
+    ``<progress_file>`` is a small JSON descriptor, ``<progress_file>.bloom`` the
+    mmap-backed filter. A false positive (at about the configured error rate)
+    would skip a domain that was never checked; with ``confirm``, every domain
+    is also written to an SQLite table (``<progress_file>.db``) and a Bloom hit
+    only counts once the table confirms it. Failed lookups are never added, so a
+    resumed scan retries them.
+    """
+
+    FORMAT = "bloom"
+
+    def __init__(
+        self,
+        progress_file: str,
+        capacity: int,
+        error_rate: float = 0.001,
+        confirm: bool = False,
+        save_every: int = 1000,
+        save_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.progress_file = progress_file
+        self.bloom_path = f"{progress_file}.bloom"
+        self.db_path = f"{progress_file}.db"
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.confirm = confirm
+        self.save_every = max(1, save_every)
+        self.save_interval = save_interval
+        self._clock = clock
+        self._pending: List[Tuple[str]] = []
+        self._unsaved = 0
+        self._last_save = clock()
+        self._bloom = None
+        self._db = None
+
+    def load(self) -> None:
+        """Open the filter, reusing the settings of an existing checkpoint."""
+        if os.path.exists(self.progress_file):
+            with open(self.progress_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != self.FORMAT:
+                raise ValueError(
+                    f"Progress file {self.progress_file} is not a Bloom checkpoint"
+                )
+            if bool(data.get("confirm")) != self.confirm:
+                print(
+                    f"Warning: {self.progress_file} was written with confirmation "
+                    f"{'on' if data.get('confirm') else 'off'}; keeping that setting",
+                    file=sys.stderr,
+                )
+            self.confirm = bool(data.get("confirm"))
+        else:
+            atomic_write_json(
+                self.progress_file,
+                {
+                    "format": self.FORMAT,
+                    "capacity": self.capacity,
+                    "error_rate": self.error_rate,
+                    "confirm": self.confirm,
+                },
+            )
+        self._bloom = BloomFilter(self.capacity, self.error_rate, self.bloom_path)
+        if self.confirm:
+            try:
+                self._db = sqlite3.connect(self.db_path)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS checked (fqdn TEXT PRIMARY KEY) WITHOUT ROWID"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                raise ValueError(f"Error opening checkpoint database {self.db_path}: {e}")
+
+    @property
+    def checked_count(self) -> int:
+        return len(self._bloom)
+
+    def is_checked(self, domain: str) -> bool:
+        if domain not in self._bloom:
+            return False
+        if self._db is None:
+            return True
+        return (
+            self._db.execute(
+                "SELECT 1 FROM checked WHERE fqdn = ?", (domain,)
+            ).fetchone()
+            is not None
+        )
+
+    def iter_unchecked(self, domains: Iterable[str]) -> Iterator[str]:
+        """Lazily filter out already checked domains"""
+        for domain in domains:
+            if not self.is_checked(domain):
+                yield domain
+
+    async def mark_checked(self, domain: str) -> None:
+        self._bloom.add(domain)
+        if self._db is not None:
+            self._pending.append((domain,))
+        self._record()
+
+    async def mark_failed(self, domain: str) -> None:
+        self._record()
+
+    def _record(self) -> None:
+        self._unsaved += 1
+        if (
+            self._unsaved >= self.save_every
+            or self._clock() - self._last_save >= self.save_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit confirmed keys and sync the filter to disk."""
+        self._unsaved = 0
+        self._last_save = self._clock()
+        try:
+            if self._db is not None and self._pending:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO checked (fqdn) VALUES (?)", self._pending
+                )
+                self._db.commit()
+                self._pending.clear()
+            self._bloom.flush()
+        except (OSError, sqlite3.Error) as e:
+            print(
+                f"Error saving progress to {self.progress_file}: {e}", file=sys.stderr
+            )
+
+    def close(self) -> None:
+        if self._bloom is None:
+            return
+        self.flush()
+        self._bloom.close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def cleanup(self) -> None:
+        """Remove the checkpoint files after completion"""
+        for path in (
+            self.progress_file,
+            self.bloom_path,
+            self.db_path,
+            f"{self.db_path}-wal",
+            f"{self.db_path}-shm",
+        ):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Error removing progress file {path}: {e}", file=sys.stderr)
@@ -0,0 +1,183 @@
+"""
+Wordlist combinators: labels built from slots of prefixes, words and suffixes.
+
+A label is one entry from every slot concatenated in order, e.g. prefixes ×
+words × words × suffixes. The cross product is enumerated lazily: each slot is
+bucketed by length, and a bucket is only entered when the labels it leads to
+can still land within ``[min_len, max_len]``, so out-of-range combinations are
+pruned before any string is built. The number of labels is computed exactly up
+front from the length buckets, without enumerating them.
+
+Labels follow the same hyphen rule as pattern mode: a join that would start or
+end the label with a hyphen, or put two hyphens together (``"trail-" +
+"-lead"``), is skipped while enumerating and left out of the count.
+
+Different splits can produce the same label ("ab" + "c" and "a" + "bc"), so
+the stream is passed through RecentSet, which forgets old entries to keep
+memory bounded, or through a BloomFilter (``--dedupe bloom``), which remembers
+every label in a fixed budget at the cost of rare false drops.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+from .wordlist import is_valid_label, parse_words
+
+
+def parse_affixes(value: str) -> List[str]:
+    """
+    Affixes from a comma-separated list, or from a file given as ``@path``.
+
+    An empty entry (e.g. ``",ly,hub"``) makes the affix optional.
+    """
+    if value.startswith("@"):
+        path = value[1:]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                affixes, invalid, _ = parse_words(f.read())
+        except (IOError, UnicodeDecodeError) as e:
+            raise ValueError(f"Error reading affix file {path}: {e}")
+        if invalid:
+            raise ValueError(f"Affix file {path} has {invalid} invalid entries")
+    else:
+        affixes = [affix.strip().lower() for affix in value.split(",")]
+        for affix in affixes:
+            if affix and not is_valid_label(affix):
+                raise ValueError(
+                    f"Invalid affix '{affix}': only letters, digits and hyphens are allowed"
+                )
+    if not affixes:
+        raise ValueError(f"No affixes in '{value}'")
+    return list(dict.fromkeys(affixes))
+
+
+class Combinator:
+    """Lazy, length-pruned cross product of word slots."""
+
+    def __init__(
+        self, slots: Sequence[Iterable[str]], min_len: int = 1, max_len: int = 63
+    ) -> None:
+        if not slots:
+            raise ValueError("A combination needs at least one slot")
+        self.min_len = min_len
+        self.max_len = max_len
+        # Per slot: label length -> words of that length, in input order
+        self._buckets: List[Dict[int, List[str]]] = []
+        # Per slot: label length -> (starts, ends with a hyphen) -> word count
+        self._edges: List[Dict[int, Dict[Tuple[bool, bool], int]]] = []
+        for slot in slots:
+            buckets: Dict[int, List[str]] = {}
+            edges: Dict[int, Dict[Tuple[bool, bool], int]] = {}
+            for word in dict.fromkeys(slot):
+                # "--" inside a word can never be part of a valid label
+                if len(word) <= max_len and "--" not in word:
+                    buckets.setdefault(len(word), []).append(word)
+                    kind = (word[:1] == "-", word[-1:] == "-")
+                    counts = edges.setdefault(len(word), {})
+                    counts[kind] = counts.get(kind, 0) + 1
+            self._buckets.append(dict(sorted(buckets.items())))
+            self._edges.append(edges)
+        # Per slot: lengths whose words join anywhere (the common case)
+        self._plain: List[Set[int]] = [
+            {
+                size
+                for size, kinds in edges.items()
+                if size and set(kinds) == {(False, False)}
+            }
+            for edges in self._edges
+        ]
+        # Shortest and longest completion from slot i to the end
+        self._min_rest = [0] * (len(slots) + 1)
+        self._max_rest = [0] * (len(slots) + 1)
+        for i in range(len(slots) - 1, -1, -1):
+            lengths = self._buckets[i].keys() or [0]
+            self._min_rest[i] = self._min_rest[i + 1] + min(lengths)
+            self._max_rest[i] = self._max_rest[i + 1] + max(lengths)
+
+    @property
+    def total(self) -> int:
+        """Exact number of labels yielded before deduplication."""
+        # Number of ways to reach each (length, ends with a hyphen), slot by
+        # slot; an empty head counts as ending with one, as neither may be
+        # followed by a leading hyphen
+        ways = {(0, True): 1}
+        for edges in self._edges:
+            step: Dict[Tuple[int, bool], int] = {}
+            for (length, hyphen), count in ways.items():
+                for size, kinds in edges.items():
+                    total = length + size
+                    if total > self.max_len:
+                        continue
+                    for (starts, ends), words in kinds.items():
+                        if starts and hyphen:
+                            continue
+                        # An empty word leaves the head as it was
+                        key = (total, ends if size else hyphen)
+                        step[key] = step.get(key, 0) + count * words
+            ways = step
+        return sum(
+            count
+            for (length, hyphen), count in ways.items()
+            if length >= self.min_len and not hyphen
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return self._expand(0, "")
+
+    def _expand(self, slot: int, head: str) -> Iterator[str]:
+        base = len(head)
+        last = slot == len(self._buckets) - 1
+        # No leading hyphen and no "--" across the join
+        joinable = head[-1:] not in ("", "-")
+        for size, words in self._buckets[slot].items():
+            low = base + size + self._min_rest[slot + 1]
+            if low > self.max_len:
+                break  # buckets are sorted, longer ones only get worse
+            if base + size + self._max_rest[slot + 1] < self.min_len:
+                continue
+            if size in self._plain[slot]:
+                if last:
+                    for word in words:
+                        yield head + word
+                else:
+                    for word in words:
+                        yield from self._expand(slot + 1, head + word)
+                continue
+            for word in words:
+                if word[:1] == "-" and not joinable:
+                    continue
+                if not last:
+                    yield from self._expand(slot + 1, head + word)
+                elif word[-1:] != "-" if word else joinable:
+                    # No trailing hyphen, from this word or the head before it
+                    yield head + word
+
+
+class RecentSet:
+    """
+    Membership set holding at most ``capacity`` entries.
+
+    Entries live in two generations; when the young one fills up the old one is
+    dropped, so duplicates are caught as long as they occur within roughly
+    ``capacity // 2`` distinct items of each other.
+    """
+
+    def __init__(self, capacity: int = 1_000_000) -> None:
+        self._limit = max(1, capacity // 2)
+        self._young: Set[str] = set()
+        self._old: Set[str] = set()
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._young or item in self._old
+
+    def add(self, item: str) -> None:
+        if len(self._young) >= self._limit:
+            self._old, self._young = self._young, set()
+        self._young.add(item)
+
+
+def dedupe(items: Iterable[str], seen: RecentSet) -> Iterator[str]:
+    """Yield items not already in ``seen`` (a RecentSet or BloomFilter), adding them as they pass."""
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
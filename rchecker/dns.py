@@ -0,0 +1,175 @@
+"""
+Minimal asynchronous DNS client used as a pre-filter before RDAP.
+
+Most short labels are already registered and delegated, which a single UDP NS
+query answers far more cheaply than an HTTPS RDAP lookup. Only names without a
+delegation (NXDOMAIN) or with an inconclusive answer go on to RDAP, which stays
+the authority on availability.
+"""
+
+import asyncio
+import random
+import struct
+from typing import Dict, Tuple
+
+QTYPE_NS = 2
+QCLASS_IN = 1
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+FLAG_RD = 0x0100
+FLAG_TC = 0x0200
+
+
+def parse_server(spec: str) -> Tuple[str, int]:
+    """Parse ``host``, ``host:port`` or ``[v6]:port`` into an address tuple."""
+    spec = spec.strip()
+    if spec.startswith("["):
+        host, _, port = spec[1:].partition("]")
+        port = port.lstrip(":")
+    elif spec.count(":") == 1:
+        host, port = spec.split(":")
+    else:
+        host, port = spec, ""
+    try:
+        return host, int(port) if port else 53
+    except ValueError:
+        raise ValueError(f"Invalid DNS resolver '{spec}', expected host[:port]")
+
+
+def encode_name(name: str) -> bytes:
+    labels = name.rstrip(".").split(".")
+    return b"".join(bytes([len(l)]) + l.encode("ascii") for l in labels) + b"\0"
+
+
+def build_query(query_id: int, name: str, qtype: int = QTYPE_NS) -> bytes:
+    header = struct.pack("!HHHHHH", query_id, FLAG_RD, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack("!HH", qtype, QCLASS_IN)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    """Offset just past a (possibly compressed) domain name."""
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_response(data: bytes) -> Tuple[int, int, bool, bytes, list]:
+    """Return ``(id, rcode, truncated, question name, answer types)``."""
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    offset = 12
+    qname = b""
+    for i in range(qdcount):
+        end = _skip_name(data, offset)
+        if i == 0:
+            qname = data[offset:end]
+        offset = end + 4
+    types = []
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack("!HHIH", data[offset : offset + 10])
+        types.append(rtype)
+        offset += 10 + rdlength
+    return query_id, flags & 0x000F, bool(flags & FLAG_TC), qname, types
+
+
+class _ResolverProtocol(asyncio.DatagramProtocol):
+    def __init__(self, resolver: "DnsResolver") -> None:
+        self.resolver = resolver
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.resolver._on_datagram(data)
+
+    def error_received(self, exc: Exception) -> None:
+        self.resolver._on_error(exc)
+
+
+class DnsResolver:
+    """
+    UDP resolver multiplexing many in-flight NS queries over one socket.
+
+    Concurrency is bounded by the caller (the number of pre-filter tasks).
+
+    ``has_delegation`` returns True when the name has NS records, False on
+    NXDOMAIN, and None when the answer is inconclusive (timeout, SERVFAIL, no NS).
+    """
+
+    def __init__(
+        self,
+        server: Tuple[str, int] = ("1.1.1.1", 53),
+        timeout: float = 2.0,
+        retries: int = 1,
+    ) -> None:
+        self.server = server
+        self.timeout = timeout
+        self.retries = retries
+        self._transport = None
+        self._pending: Dict[int, Tuple[bytes, asyncio.Future]] = {}
+        self.queries = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ResolverProtocol(self), remote_addr=self.server
+        )
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        for _, future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    def _on_datagram(self, data: bytes) -> None:
+        try:
+            query_id, rcode, truncated, qname, types = parse_response(data)
+        except (struct.error, IndexError):
+            return
+        entry = self._pending.get(query_id)
+        # Ignore stray or spoofed answers for a different question
+        if entry is None or entry[0] != qname.lower():
+            return
+        future = entry[1]
+        if not future.done():
+            future.set_result((rcode, truncated, types))
+
+    def _on_error(self, exc: Exception) -> None:
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    def _new_id(self) -> int:
+        while True:
+            query_id = random.getrandbits(16)
+            if query_id not in self._pending:
+                return query_id
+
+    async def has_delegation(self, fqdn: str) -> bool | None:
+        for _ in range(self.retries + 1):
+            query_id = self._new_id()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[query_id] = (encode_name(fqdn.lower()), future)
+            self.queries += 1
+            try:
+                self._transport.sendto(build_query(query_id, fqdn))
+                rcode, truncated, types = await asyncio.wait_for(
+                    future, self.timeout
+                )
+            except (asyncio.TimeoutError, OSError):
+                continue
+            finally:
+                self._pending.pop(query_id, None)
+            if rcode == RCODE_NXDOMAIN:
+                return False
+            if rcode == RCODE_NOERROR and (QTYPE_NS in types or truncated):
+                return True
+            return None
+        self.failures += 1
+        return None
@@ -0,0 +1,154 @@
+"""
+Index-addressable enumeration of pattern-mode labels.
+
+Pattern mode expands ``prefix*`` into ``prefix + suffix`` for every suffix in
+``itertools.product(charset, repeat=n)`` and every length in ``[min, max]``. That
+sequence is fully determined by its arguments, so any position in it can be
+decoded directly (mixed-radix, one digit per suffix character) and iteration can
+start at an arbitrary index without generating what comes before it.
+"""
+
+import bisect
+import itertools
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+
+class Keyspace:
+    """Ordered pattern-mode label space with O(length) index-to-label decoding."""
+
+    def __init__(
+        self, prefix: str, wildcard: bool, min_len: int, max_len: int, charset: str
+    ) -> None:
+        self.prefix = prefix
+        self.wildcard = wildcard
+        self.charset = charset
+        # (first index, suffix length, label count) for each label length
+        self._segments: List[Tuple[int, int, int]] = []
+        total = 0
+        for length in range(min_len, max_len + 1):
+            if length < len(prefix):
+                continue
+            suffix_len = length - len(prefix)
+            if suffix_len == 0:
+                count = 1
+            elif wildcard:
+                count = len(charset) ** suffix_len
+            else:
+                continue
+            self._segments.append((total, suffix_len, count))
+            total += count
+        self.total = total
+        self._starts = [segment[0] for segment in self._segments]
+
+    def __len__(self) -> int:
+        return self.total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Return (segment position, offset within segment) for an index."""
+        if not 0 <= index < self.total:
+            raise IndexError(f"Keyspace index {index} out of range (0..{self.total})")
+        pos = bisect.bisect_right(self._starts, index) - 1
+        return pos, index - self._starts[pos]
+
+    def _digits(self, offset: int, suffix_len: int) -> List[int]:
+        radix = len(self.charset)
+        digits = [0] * suffix_len
+        for i in range(suffix_len - 1, -1, -1):
+            offset, digits[i] = divmod(offset, radix)
+        return digits
+
+    def label_at(self, index: int) -> str:
+        """Decode the label at ``index`` without enumerating its predecessors."""
+        pos, offset = self._locate(index)
+        suffix_len = self._segments[pos][1]
+        charset = self.charset
+        return self.prefix + "".join(
+            charset[d] for d in self._digits(offset, suffix_len)
+        )
+
+    def iter_labels(self, start: int = 0) -> Iterator[str]:
+        """Yield labels in order beginning at ``start``."""
+        if start >= self.total:
+            return
+        pos, offset = self._locate(start)
+        for i in range(pos, len(self._segments)):
+            _, suffix_len, _ = self._segments[i]
+            digits = self._digits(offset, suffix_len) if i == pos else [0] * suffix_len
+            for suffix in self._suffixes_from(digits):
+                yield self.prefix + suffix
+
+    def iter_from(self, start: int = 0, step: int = 1) -> Iterator[Tuple[int, str]]:
+        """Yield ``(index, label)`` pairs beginning at ``start``, every ``step``-th one."""
+        labels = self.iter_labels(start)
+        if step > 1:
+            labels = itertools.islice(labels, 0, None, step)
+        return zip(itertools.count(start, step), labels)
+
+    def _suffixes_from(self, digits: List[int]) -> Iterator[str]:
+        """All suffixes of len(digits) that sort at or after ``digits``."""
+        if not digits:
+            yield ""
+            return
+        charset = self.charset
+        head = charset[digits[0]]
+        for rest in self._suffixes_from(digits[1:]):
+            yield head + rest
+        # Everything after the first digit is a plain product, the fast path
+        tail_len = len(digits) - 1
+        for ch in charset[digits[0] + 1 :]:
+            for combo in itertools.product(charset, repeat=tail_len):
+                yield ch + "".join(combo)
+
+
+class IntervalSet:
+    """Sorted, merged half-open ``[start, end)`` integer intervals."""
+
+    def __init__(self, intervals: Iterable[Sequence[int]] = ()) -> None:
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in sorted(intervals):
+            if self._ends and start <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    @classmethod
+    def from_values(cls, values: Iterable[int]) -> "IntervalSet":
+        return cls((value, value + 1) for value in values)
+
+    def add(self, value: int) -> None:
+        starts, ends = self._starts, self._ends
+        pos = bisect.bisect_right(starts, value) - 1
+        if pos >= 0 and starts[pos] <= value < ends[pos]:
+            return
+        joins_left = pos >= 0 and ends[pos] == value
+        joins_right = pos + 1 < len(starts) and starts[pos + 1] == value + 1
+        if joins_left and joins_right:
+            ends[pos] = ends[pos + 1]
+            del starts[pos + 1], ends[pos + 1]
+        elif joins_left:
+            ends[pos] = value + 1
+        elif joins_right:
+            starts[pos + 1] = value
+        else:
+            starts.insert(pos + 1, value)
+            ends.insert(pos + 1, value + 1)
+
+    def __len__(self) -> int:
+        return sum(end - start for start, end in zip(self._starts, self._ends))
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end)
+
+    def intervals(self, start_at: int = None) -> List[List[int]]:
+        """Intervals as lists, optionally clipped to values >= ``start_at``."""
+        result = []
+        for start, end in zip(self._starts, self._ends):
+            if start_at is not None:
+                if end <= start_at:
+                    continue
+                start = max(start, start_at)
+            result.append([start, end])
+        return result
@@ -4,15 +4,56 @@ import itertools
 import json
 import os
 import random
+import shlex
 import ssl
 import string
 import sys
-from typing import Iterable, Set
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Set
 from urllib.parse import urlparse
 
 import aiohttp
 from tqdm import tqdm
 
+from .bench import run_bench
+from .bloom import BloomFilter
+from .bootstrap import RdapBootstrap
+from .cache import ResultCache
+from .checker import Checker
+from .checkpoint import (
+    OP_CHECKED,
+    OP_FAILED,
+    BloomProgress,
+    CheckpointJournal,
+    KeyspaceProgress,
+    detect_checkpoint_format,
+)
+from .combinators import Combinator, RecentSet, dedupe, parse_affixes
+from .dns import DnsResolver, parse_server
+from .keyspace import Keyspace
+from .metrics import serve_metrics
+from .output import (
+    RESULT_FORMATS,
+    AvailabilityMatrix,
+    AvailableListWriter,
+    BackgroundWriter,
+    open_result_writer,
+    read_results,
+)
+from .pattern import compile_pattern
+from .ratelimit import RateLimiter  # noqa: F401  re-exported by the package
+from .result import (
+    AVAILABLE,
+    ERROR,
+    REGISTERED,
+    LookupResult,
+)
+from .retry import RETRY_CLASSES, parse_retry_classes
+from .shard import parse_shard, shard_size, supervise
+from .shutdown import GracefulShutdown, ScanInterrupted
+from .transport import TRANSPORTS
+from .wordlist import parse_words, read_index, warn_invalid, write_index
+
 # Predefined wordlist sources
 WORDLIST_SOURCES = {
     "common": {
@@ -41,274 +82,566 @@ WORDLIST_SOURCES = {
 class ProgressManager:
     """Manages checkpoint/resume functionality"""
 
-    def __init__(self, progress_file: str = None):
+    def __init__(
+        self,
+        progress_file: str = None,
+        flush_every: int = 1000,
+        flush_interval: float = 1.0,
+    ):
         self.progress_file = progress_file
         self.checked_domains: Set[str] = set()
-        self._lock = asyncio.Lock()
-        if progress_file and os.path.exists(progress_file):
+        self.failed_domains: Set[str] = set()  # last lookup failed; retried on resume
+        self._journal = (
+            CheckpointJournal(progress_file, flush_every, flush_interval)
+            if progress_file
+            else None
+        )
+        if self._journal:
             self._load_progress()
 
     def _load_progress(self):
-        """Load progress from file"""
+        """Load progress from the snapshot and replay the journal"""
         try:
-            with open(self.progress_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.checked_domains = set(data.get("checked_domains", []))
+            self.checked_domains, self.failed_domains = self._journal.replay()
         except (json.JSONDecodeError, IOError) as e:
-            print(
-                f"Error loading progress file {self.progress_file}: {e}",
-                file=sys.stderr,
+            # Starting over would overwrite the file and lose every result in it
+            raise ValueError(
+                f"Error loading progress file {self.progress_file}: {e}; "
+                "repair or remove it, or choose another --progress-file"
             )
-            self.checked_domains = set()
 
-    async def mark_checked(self, domain: str):
-        """Mark domain as checked and save progress"""
-        async with self._lock:
-            self.checked_domains.add(domain)
-            if self.progress_file:
-                await self._save_progress()
-
-    async def _save_progress(self):
-        """Save progress to file"""
-        try:
-            data = {"checked_domains": list(self.checked_domains)}
-            with open(self.progress_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except IOError as e:
-            print(
-                f"Error saving progress to {self.progress_file}: {e}", file=sys.stderr
-            )
+    @property
+    def checked_count(self) -> int:
+        return len(self.checked_domains)
 
-    def is_checked(self, domain: str) -> bool:
-        """Check if domain has been checked"""
-        return domain in self.checked_domains
+    @property
+    def failed_count(self) -> int:
+        return len(self.failed_domains)
 
-    def get_unchecked_domains(self, all_domains: list) -> list:
-        """Filter out already checked domains"""
-        return [domain for domain in all_domains if not self.is_checked(domain)]
+    async def mark_checked(self, domain: str):
+        """Mark domain as checked and append it to the journal"""
+        self.checked_domains.add(domain)
+        self.failed_domains.discard(domain)
+        self._append(domain, OP_CHECKED)
+
+    async def mark_failed(self, domain: str):
+        """Record a failed lookup; it stays unchecked so a resume tries it again"""
+        self.failed_domains.add(domain)
+        self._append(domain, OP_FAILED)
+
+    def _append(self, domain: str, op: str):
+        if self._journal:
+            try:
+                self._journal.append(domain, op)
+                if self._journal.should_compact():
+                    self._journal.compact(self.checked_domains, self.failed_domains)
+            except IOError as e:
+                print(
+                    f"Error saving progress to {self.progress_file}: {e}",
+                    file=sys.stderr,
+                )
 
-    def cleanup(self):
-        """Clean up progress file after completion"""
-        if self.progress_file and os.path.exists(self.progress_file):
+    def flush(self):
+        """Force buffered journal records to disk"""
+        if self._journal:
             try:
-                os.remove(self.progress_file)
+                self._journal.flush()
             except IOError as e:
                 print(
-                    f"Error removing progress file {self.progress_file}: {e}",
+                    f"Error saving progress to {self.progress_file}: {e}",
                     file=sys.stderr,
                 )
 
+    def close(self):
+        """Flush and close the journal, keeping the files for a later resume"""
+        if self._journal:
+            try:
+                self._journal.close()
+            except IOError as e:
+                print(
+                    f"Error saving progress to {self.progress_file}: {e}",
+                    file=sys.stderr,
+                )
 
-class RateLimiter:
-    """Simple async rate limiter enforcing a global requests-per-second cap."""
+    def is_checked(self, domain: str) -> bool:
+        """Check if domain has been checked"""
+        return domain in self.checked_domains
 
-    def __init__(self, rate: float | None) -> None:
-        if rate is not None and rate <= 0:
-            raise ValueError("Rate must be positive or omitted")
-        self._interval = 1.0 / rate if rate else None
-        self._lock = asyncio.Lock()
-        self._next_time = 0.0
+    def get_unchecked_domains(self, all_domains: list) -> list:
+        """Filter out already checked domains"""
+        return list(self.iter_unchecked(all_domains))
 
-    async def wait(self) -> None:
-        if self._interval is None:
-            return
-        async with self._lock:
-            loop = asyncio.get_running_loop()
-            now = loop.time()
-            sleep_for = self._next_time - now
-            if sleep_for > 0:
-                await asyncio.sleep(sleep_for)
-                now = loop.time()
-            self._next_time = max(now, self._next_time) + self._interval
+    def iter_unchecked(self, domains: Iterable[str]) -> Iterator[str]:
+        """Lazily filter out already checked domains"""
+        checked = self.checked_domains
+        for domain in domains:
+            if domain not in checked:
+                yield domain
+
+    def cleanup(self):
+        """Clean up progress files after completion"""
+        if self._journal:
+            self._journal.remove()
 
 
 class Stats:
+    """
+    Lookup counters and the progress bar.
+
+    Counters are plain integers updated from the event loop, so the hot path
+    takes no lock and does no formatting; a renderer task redraws the bar every
+    ``refresh_interval`` seconds from a snapshot instead of once per lookup.
+    """
+
     def __init__(
-        self, total: int = 0, show_progress: bool = True, output_file: str = None
+        self,
+        total: int = 0,
+        show_progress: bool = True,
+        *,
+        refresh_interval: float = 0.2,
     ) -> None:
         self.available = 0
         self.registered = 0
         self.errors = 0
         self.completed = 0
-        self._lock = asyncio.Lock()
+        self.prefiltered = 0
+        self.last_domain = ""
         self.show_progress = show_progress
-        self.output_file = output_file
-        self._file_handle = None
+        self.refresh_interval = refresh_interval
+        self._renderer = None
         if show_progress:
             self.pbar = tqdm(total=total, desc="Checking domains", unit="domain")
         else:
             self.pbar = None
 
-        # Initialize output file if specified
-        if self.output_file:
-            try:
-                self._file_handle = open(self.output_file, "w", encoding="utf-8")
-            except IOError as e:
-                print(
-                    f"Error opening output file {self.output_file}: {e}",
-                    file=sys.stderr,
-                )
-                self._file_handle = None
-
-    async def add_available(self, domain: str = "") -> None:
-        async with self._lock:
-            self.available += 1
-            self.completed += 1
-            if domain and self._file_handle:
-                try:
-                    self._file_handle.write(f"{domain}\n")
-                    self._file_handle.flush()  # Ensure immediate write to disk
-                except IOError as e:
-                    print(
-                        f"Error writing domain {domain} to file: {e}", file=sys.stderr
-                    )
-            if self.pbar:
-                self.pbar.update(1)
-                self.pbar.set_postfix(
-                    available=self.available,
-                    registered=self.registered,
-                    errors=self.errors,
-                )
-
-    async def add_registered(self, domain: str = "") -> None:
-        async with self._lock:
-            self.registered += 1
-            self.completed += 1
-            if self.pbar:
-                self.pbar.update(1)
-                self.pbar.set_postfix(
-                    available=self.available,
-                    registered=self.registered,
-                    errors=self.errors,
-                )
-
-    async def add_error(self, domain: str = "") -> None:
-        async with self._lock:
-            self.errors += 1
-            self.completed += 1
-            if self.pbar:
-                self.pbar.update(1)
-                self.pbar.set_postfix(
-                    available=self.available,
-                    registered=self.registered,
-                    errors=self.errors,
-                )
-
-    async def update_current(self, domain: str) -> None:
-        """Update current domain being checked"""
-        async with self._lock:
-            if self.pbar:
-                self.pbar.set_description(f"Checking {domain}")
+        # Hits are echoed through a writer thread so terminal latency never
+        # stalls the event loop
+        self._stdout = BackgroundWriter(sys.stdout, batch_size=100, flush_interval=0.2)
+
+    def add_available(self, domain: str = "") -> None:
+        self.available += 1
+        self.completed += 1
+        if domain:
+            self.last_domain = domain
+            self._stdout.write(f"AVAILABLE  {domain}")
+
+    def add_registered(self, domain: str = "") -> None:
+        self.registered += 1
+        self.completed += 1
+        self.last_domain = domain or self.last_domain
+
+    def add_error(self, domain: str = "") -> None:
+        self.errors += 1
+        self.completed += 1
+        self.last_domain = domain or self.last_domain
+
+    def snapshot(self) -> Dict[str, int]:
+        """Consistent copy of the counters (taken without yielding to the loop)."""
+        return {
+            "completed": self.completed,
+            "available": self.available,
+            "registered": self.registered,
+            "errors": self.errors,
+            "prefiltered": self.prefiltered,
+        }
+
+    def start(self) -> None:
+        """Start redrawing the progress bar; needs a running event loop."""
+        if self.pbar and self._renderer is None:
+            self._renderer = asyncio.create_task(self._render())
+
+    async def _render(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            self._draw()
+
+    def _draw(self) -> None:
+        snapshot = self.snapshot()
+        self.pbar.n = snapshot["completed"]
+        if self.last_domain:
+            self.pbar.set_description(f"Checking {self.last_domain}", refresh=False)
+        self.pbar.set_postfix(
+            available=snapshot["available"],
+            registered=snapshot["registered"],
+            errors=snapshot["errors"],
+            refresh=False,
+        )
+        self.pbar.refresh()
 
     def close(self) -> None:
+        """Stop the renderer and flush buffered output; safe to call more than once."""
+        if self._renderer:
+            self._renderer.cancel()
+            self._renderer = None
         if self.pbar:
+            self._draw()
             self.pbar.close()
-        if self._file_handle:
-            try:
-                self._file_handle.close()
-                if self.available > 0:
-                    print(
-                        f"Available domains saved to: {self.output_file}",
-                        file=sys.stderr,
-                    )
-                else:
-                    print("No available domains found.", file=sys.stderr)
-            except IOError as e:
-                print(f"Error closing output file: {e}", file=sys.stderr)
+            self.pbar = None
+        self._stdout.close()
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
-        description="Check domain availability for generated second-level names.",
-    )
+def _add_check_arguments(
+    parser: argparse.ArgumentParser, default_rate: float, default_concurrency: int
+) -> None:
+    """Register the options shared by 'check' and the implicit default command."""
+    _add_source_arguments(parser)
+    _add_lookup_arguments(parser, default_rate, default_concurrency)
 
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
-    # Check command (default behavior)
-    check_parser = subparsers.add_parser("check", help="Check domain availability")
-    check_parser.add_argument(
+def _add_source_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options that choose the candidate domains (pattern or wordlist, TLDs, shards)."""
+    parser.add_argument(
         "pattern",
         nargs="?",
-        help="Pattern for the second-level domain (supports optional trailing '*'). Optional when using --wordlist.",
+        help="Pattern for the second-level domain: letters, digits and hyphens, '?' for any --charset character, [classes] such as [bcd] or [a-f0-9], and '*' for any run of characters, anywhere. Optional when using --wordlist.",
     )
-    check_parser.add_argument(
-        "--tld", default="com", help="Top-level domain to check, e.g. 'com'."
+    parser.add_argument(
+        "--tld",
+        default="com",
+        help="Top-level domain(s) to check, e.g. 'com' or 'com,net,io'.",
     )
-    check_parser.add_argument(
+    parser.add_argument(
+        "--tld-file",
+        type=str,
+        help="File with one TLD per line; overrides --tld.",
+    )
+    parser.add_argument(
         "--max",
         type=int,
         required=True,
         help="Maximum length of the second-level domain (inclusive).",
     )
-    check_parser.add_argument(
+    parser.add_argument(
         "--min",
         type=int,
         help="Minimum length of the second-level domain (defaults to --max).",
     )
-    check_parser.add_argument(
+    parser.add_argument(
+        "--charset",
+        default=string.ascii_lowercase,
+        help="Characters to use for '?', '*' and [^...] expansion (default: lowercase letters).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=str,
+        help="Check only shard i of N (format i/N) of the candidate space, for splitting a scan across hosts.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run the scan as this many local processes, each with a shard and an equal share of --rate and --concurrency. -o, --results and --matrix are merged when all shards finish; checkpoints stay per shard.",
+    )
+    parser.add_argument(
+        "--shuffle",
+        action="store_true",
+        help="Shuffle the order of domains to check randomly.",
+    )
+    parser.add_argument(
+        "--shuffle-buffer",
+        type=int,
+        default=100_000,
+        help="Window size used by --shuffle; larger windows mix more but use more memory (default: 100000).",
+    )
+    parser.add_argument(
+        "--wordlist",
+        "-w",
+        type=str,
+        help="Path to wordlist file (one word per line). When specified, uses words from file instead of pattern expansion.",
+    )
+    parser.add_argument(
+        "--wordlist-index",
+        action="store_true",
+        help="Cache a length-bucketed index of the wordlist next to it (<wordlist>.idx) and load --min/--max slices from it on later runs; words come out shortest first.",
+    )
+    parser.add_argument(
+        "--prefixes",
+        type=str,
+        help="Prepend each of these to every wordlist label: comma-separated, or @file; an empty entry keeps the bare word (e.g. ',get,my').",
+    )
+    parser.add_argument(
+        "--suffixes",
+        type=str,
+        help="Append each of these to every wordlist label: comma-separated, or @file; an empty entry keeps the bare word (e.g. ',ly,hub,app').",
+    )
+    parser.add_argument(
+        "--compound",
+        type=int,
+        default=1,
+        help="Join this many wordlist words per label, e.g. 2 for word+word (default: 1).",
+    )
+    parser.add_argument(
+        "--dedupe-memory",
+        type=int,
+        default=1_000_000,
+        help="Recent combined labels remembered to drop duplicates with --dedupe recent (default: 1000000).",
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=["recent", "bloom"],
+        default="recent",
+        help="Filter for duplicate combined labels: a bounded set of recent ones, or a Bloom filter over all of them (default: recent).",
+    )
+    parser.add_argument(
+        "--bloom-error-rate",
+        type=float,
+        default=0.001,
+        help="False-positive rate of Bloom filters used by --dedupe bloom and --checkpoint bloom (default: 0.001).",
+    )
+    parser.add_argument(
+        "--bloom-memory",
+        type=int,
+        default=512,
+        help="Memory cap in MB for the --dedupe bloom filter; larger label sets get a higher false-positive rate (default: 512).",
+    )
+
+
+def _add_lookup_arguments(
+    parser: argparse.ArgumentParser, default_rate: float, default_concurrency: int
+) -> None:
+    """Options for how domains are looked up and where outcomes go; shared with 'recheck'."""
+    parser.add_argument(
+        "--results",
+        type=str,
+        help="Write every outcome with its HTTP status, latency and attempts to this file (.jsonl, .csv, .gz columnar or .parquet).",
+    )
+    parser.add_argument(
+        "--results-format",
+        choices=[fmt for fmt in RESULT_FORMATS if fmt != "text"],
+        help="Format of --results (default: inferred from the file extension).",
+    )
+    parser.add_argument(
+        "--matrix",
+        type=str,
+        help=(
+            "Write a per-label availability matrix (CSV, one column per TLD) to this "
+            "file; --resume and recheck append to it."
+        ),
+    )
+    parser.add_argument(
         "--rate",
         type=float,
-        default=50.0,
-        help="Maximum lookups per second. Set to 0 to disable throttling.",
+        default=default_rate,
+        help="Maximum lookups per second per registry host. Set to 0 to disable throttling.",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=1,
+        help="Lookups allowed back-to-back before --rate pacing applies (default: 1).",
+    )
+    parser.add_argument(
+        "--adaptive-rate",
+        action="store_true",
+        help="Adapt each registry's rate from its responses: grow while healthy, back off on 429/503 and honour Retry-After. --rate is the starting rate.",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=0.0,
+        help="Upper bound for --adaptive-rate (default: no bound).",
     )
-    check_parser.add_argument(
+    parser.add_argument(
         "--concurrency",
         type=int,
-        default=15,
-        help="Number of concurrent lookup workers.",
+        default=default_concurrency,
+        help="Maximum number of RDAP requests in flight at once, across all registries.",
     )
-    check_parser.add_argument(
+    parser.add_argument(
         "--timeout",
         type=float,
         default=10.0,
         help="HTTP timeout per RDAP request in seconds.",
     )
-    check_parser.add_argument(
-        "--charset",
-        default=string.ascii_lowercase,
-        help="Characters to use for wildcard expansion (default: lowercase letters).",
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default="aiohttp",
+        help="HTTP client: aiohttp (HTTP/1.1, one request per connection) or http2 (multiplexed streams; needs 'rchecker[http2]') (default: aiohttp).",
+    )
+    parser.add_argument(
+        "--max-streams",
+        type=int,
+        default=100,
+        help="With --transport http2, the most requests in flight per registry host (default: 100).",
+    )
+    parser.add_argument(
+        "--no-head",
+        action="store_true",
+        help="Always send GET. By default a lookup that only needs the status code sends HEAD, falling back to GET for registries that reject it.",
     )
-    check_parser.add_argument(
+    parser.add_argument(
+        "--warm-up",
+        type=int,
+        default=0,
+        help="Requests sent to each registry host before lookups start, to open connections up front (default: 0).",
+    )
+    parser.add_argument(
         "--retries",
         type=int,
         default=2,
         help="Number of retries for failed requests (default: 2).",
     )
-    check_parser.add_argument(
+    parser.add_argument(
+        "--retry-base-delay",
+        type=float,
+        default=0.5,
+        help="Backoff before the first retry in seconds; doubles per retry, with full jitter (default: 0.5).",
+    )
+    parser.add_argument(
+        "--retry-max-delay",
+        type=float,
+        default=30.0,
+        help="Cap on the backoff between retries in seconds (default: 30).",
+    )
+    parser.add_argument(
+        "--retry-on",
+        default=",".join(RETRY_CLASSES),
+        help=f"Comma-separated failure classes to retry: {', '.join(RETRY_CLASSES)} (default: all).",
+    )
+    parser.add_argument(
+        "--final-retry-pass",
+        action="store_true",
+        help="Hold lookups that still fail back and retry them once more after everything else has been checked.",
+    )
+    parser.add_argument(
+        "--rdap-url",
+        type=str,
+        help="Send every lookup to this RDAP base URL instead of the registry from the IANA bootstrap (e.g. https://rdap.org/).",
+    )
+    parser.add_argument(
+        "--rdap-bootstrap",
+        type=str,
+        help="Use this IANA-format RDAP bootstrap file instead of downloading one.",
+    )
+    parser.add_argument(
+        "--bootstrap-cache",
+        type=str,
+        help="Path of the cached RDAP bootstrap registry (default: ~/.cache/rchecker/rdap_dns.json).",
+    )
+    parser.add_argument(
+        "--bootstrap-ttl",
+        type=float,
+        default=24.0,
+        help="Hours before the cached RDAP bootstrap registry is refreshed (default: 24).",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while the scan runs (default: off).",
+    )
+    parser.add_argument(
         "--no-progress",
         action="store_true",
         help="Disable progress bar display.",
     )
-    check_parser.add_argument(
+    parser.add_argument(
         "--output",
         "-o",
         type=str,
         help="Output file for available domains (default: available_domains.txt).",
         default="available_domains.txt",
     )
-    check_parser.add_argument(
+    parser.add_argument(
         "--resume",
         action="store_true",
-        help="Resume from the last checkpoint if progress file exists.",
+        help="Resume from the last checkpoint if progress file exists; lookups that failed are retried (and counted, except with --checkpoint bloom).",
     )
-    check_parser.add_argument(
+    parser.add_argument(
         "--progress-file",
         type=str,
         help="Path to progress file for checkpoint/resume (default: .dcheck_progress.json).",
         default=".dcheck_progress.json",
     )
-    check_parser.add_argument(
-        "--shuffle",
+    parser.add_argument(
+        "--checkpoint",
+        choices=["auto", "domains", "keyspace", "bloom"],
+        default="auto",
+        help="Checkpoint format: a set of checked domains, compact index ranges for pattern mode, or a Bloom filter of checked domains (default: auto).",
+    )
+    parser.add_argument(
+        "--bloom-confirm",
         action="store_true",
-        help="Shuffle the order of domains to check randomly.",
+        help="With --checkpoint bloom, also keep exact keys in SQLite so false positives never skip an unchecked domain.",
     )
-    check_parser.add_argument(
-        "--wordlist",
-        "-w",
+    parser.add_argument(
+        "--checkpoint-batch",
+        type=int,
+        default=1000,
+        help="Checkpoint records buffered before the journal is fsynced (default: 1000).",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=1.0,
+        help="Maximum seconds between checkpoint journal fsyncs (default: 1.0).",
+    )
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds lookups in flight get to finish after SIGINT/SIGTERM before the checkpoint is saved (default: 10).",
+    )
+    parser.add_argument(
+        "--cache",
         type=str,
-        help="Path to wordlist file (one word per line). When specified, uses words from file instead of pattern expansion.",
+        help="SQLite result cache; fresh entries are answered without a lookup and new results are stored.",
+    )
+    parser.add_argument(
+        "--cache-ttl-registered",
+        type=float,
+        default=720.0,
+        help="Hours a cached 'registered' result stays fresh, capped at the RDAP expiry date (default: 720).",
+    )
+    parser.add_argument(
+        "--cache-ttl-available",
+        type=float,
+        default=24.0,
+        help="Hours a cached 'available' result stays fresh (default: 24).",
+    )
+    parser.add_argument(
+        "--cache-ttl-error",
+        type=float,
+        default=0.0,
+        help="Hours a cached error stays fresh; 0 never caches errors (default: 0).",
+    )
+    parser.add_argument(
+        "--dns-prefilter",
+        action="store_true",
+        help="Query NS records first; domains with a delegation are reported registered without an RDAP lookup.",
+    )
+    parser.add_argument(
+        "--dns-resolver",
+        type=str,
+        default="1.1.1.1",
+        help="Recursive resolver for --dns-prefilter, as host[:port] (default: 1.1.1.1).",
+    )
+    parser.add_argument(
+        "--dns-concurrency",
+        type=int,
+        default=100,
+        help="Concurrent DNS queries for --dns-prefilter (default: 100).",
+    )
+    parser.add_argument(
+        "--dns-timeout",
+        type=float,
+        default=2.0,
+        help="Seconds to wait for a DNS answer before falling back to RDAP (default: 2.0).",
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Check domain availability for generated second-level names.",
     )
 
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    # Check command (default behavior)
+    check_parser = subparsers.add_parser("check", help="Check domain availability")
+    _add_check_arguments(check_parser, default_rate=50.0, default_concurrency=15)
+
     # Download command
     download_parser = subparsers.add_parser(
         "download", help="Download wordlists from online sources"
@@ -330,10 +663,92 @@ def parse_args() -> argparse.Namespace:
         help="Overwrite existing file if it exists.",
     )
 
-    # Check if the first argument is a valid subcommand
-    import sys
+    # Bench command
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark the pipeline against a local mock RDAP server"
+    )
+    bench_parser.add_argument(
+        "--domains",
+        type=int,
+        default=5000,
+        help="Domains checked per scenario (default: 5000).",
+    )
+    bench_parser.add_argument(
+        "--concurrency",
+        default="10,50,100",
+        help="Comma-separated --concurrency values to try (default: 10,50,100).",
+    )
+    bench_parser.add_argument(
+        "--rate",
+        default="0",
+        help="Comma-separated --rate values to try; 0 disables throttling (default: 0).",
+    )
+    bench_parser.add_argument(
+        "--transport",
+        default="aiohttp",
+        help="Comma-separated --transport values to compare; http2 runs against an h2c mock (default: aiohttp).",
+    )
+    bench_parser.add_argument(
+        "--latency",
+        default="lognormal:5:0.5",
+        help="Mock response latency in ms: fixed:MS, uniform:LO:HI, exp:MEAN or lognormal:MEDIAN:SIGMA (default: lognormal:5:0.5).",
+    )
+    bench_parser.add_argument(
+        "--available-ratio",
+        type=float,
+        default=0.2,
+        help="Share of domains the mock reports available (404) (default: 0.2).",
+    )
+    bench_parser.add_argument(
+        "--throttle-ratio",
+        type=float,
+        default=0.0,
+        help="Share of requests answered 429 with Retry-After (default: 0).",
+    )
+    bench_parser.add_argument(
+        "--drop-ratio",
+        type=float,
+        default=0.0,
+        help="Share of requests whose connection is dropped (default: 0).",
+    )
+    bench_parser.add_argument(
+        "--check-args",
+        type=str,
+        help="Extra check options for every scenario, e.g. \"--cache /tmp/c.db --results /tmp/r.jsonl\".",
+    )
+    bench_parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Report the peak Python heap per scenario (slows the run down).",
+    )
+    bench_parser.add_argument(
+        "--seed", type=int, default=0, help="Seed for the mock's random choices."
+    )
+
+    # Recheck command
+    recheck_parser = subparsers.add_parser(
+        "recheck", help="Look up again only the domains that errored in a results file"
+    )
+    recheck_parser.add_argument(
+        "previous",
+        help="Results file of an earlier scan (--results); its error outcomes are re-queried.",
+    )
+    recheck_parser.add_argument(
+        "--previous-format",
+        choices=[fmt for fmt in RESULT_FORMATS if fmt != "text"],
+        help="Format of the previous results file (default: inferred from the extension).",
+    )
+    # Errors usually come from an overloaded registry or network, so go gently
+    _add_lookup_arguments(recheck_parser, default_rate=10.0, default_concurrency=5)
+    recheck_parser.set_defaults(
+        progress_file=".dcheck_recheck_progress.json",
+        workers=1,
+        shard=None,
+        shuffle=False,
+    )
 
-    if len(sys.argv) > 1 and sys.argv[1] in ["check", "download"]:
+    # Check if the first argument is a valid subcommand
+    if len(sys.argv) > 1 and sys.argv[1] in ["check", "download", "bench", "recheck"]:
         args = parser.parse_args()
     else:
         # If no command is specified or first arg is not a command, assume 'check' command for backward compatibility
@@ -341,176 +756,82 @@ def parse_args() -> argparse.Namespace:
         parser = argparse.ArgumentParser(
             description="Check domain availability for generated second-level names.",
         )
-        parser.add_argument(
-            "pattern",
-            nargs="?",
-            help="Pattern for the second-level domain (supports optional trailing '*'). Optional when using --wordlist.",
-        )
-        parser.add_argument(
-            "--tld", default="com", help="Top-level domain to check, e.g. 'com'."
-        )
-        parser.add_argument(
-            "--max",
-            type=int,
-            required=True,
-            help="Maximum length of the second-level domain (inclusive).",
-        )
-        parser.add_argument(
-            "--min",
-            type=int,
-            help="Minimum length of the second-level domain (defaults to --max).",
-        )
-        parser.add_argument(
-            "--rate",
-            type=float,
-            default=10.0,
-            help="Maximum lookups per second. Set to 0 to disable throttling.",
-        )
-        parser.add_argument(
-            "--concurrency",
-            type=int,
-            default=20,
-            help="Number of concurrent lookup workers.",
-        )
-        parser.add_argument(
-            "--timeout",
-            type=float,
-            default=10.0,
-            help="HTTP timeout per RDAP request in seconds.",
-        )
-        parser.add_argument(
-            "--charset",
-            default=string.ascii_lowercase,
-            help="Characters to use for wildcard expansion (default: lowercase letters).",
-        )
-        parser.add_argument(
-            "--retries",
-            type=int,
-            default=2,
-            help="Number of retries for failed requests (default: 2).",
-        )
-        parser.add_argument(
-            "--no-progress",
-            action="store_true",
-            help="Disable progress bar display.",
-        )
-        parser.add_argument(
-            "--output",
-            "-o",
-            type=str,
-            help="Output file for available domains (default: available_domains.txt).",
-            default="available_domains.txt",
-        )
-        parser.add_argument(
-            "--resume",
-            action="store_true",
-            help="Resume from the last checkpoint if progress file exists.",
-        )
-        parser.add_argument(
-            "--progress-file",
-            type=str,
-            help="Path to progress file for checkpoint/resume (default: .dcheck_progress.json).",
-            default=".dcheck_progress.json",
-        )
-        parser.add_argument(
-            "--shuffle",
-            action="store_true",
-            help="Shuffle the order of domains to check randomly.",
-        )
-        parser.add_argument(
-            "--wordlist",
-            "-w",
-            type=str,
-            help="Path to wordlist file (one word per line). When specified, uses words from file instead of pattern expansion.",
-        )
+        _add_check_arguments(parser, default_rate=10.0, default_concurrency=20)
         args = parser.parse_args()
         args.command = "check"
 
     return args
 
 
-def validate_pattern(pattern: str) -> tuple[str, bool]:
-    if pattern.count("*") > 1:
-        raise ValueError("Only a single trailing '*' wildcard is supported")
-    if "*" in pattern:
-        if not pattern.endswith("*"):
-            raise ValueError("'*' is only supported at the end of the pattern")
-        prefix = pattern[:-1]
-        wildcard = True
-    else:
-        prefix = pattern
-        wildcard = False
-    if not prefix:
-        raise ValueError("Pattern prefix cannot be empty")
-    prefix = prefix.lower()
-    allowed = set(string.ascii_lowercase + string.digits + "-")
-    if any(ch not in allowed for ch in prefix):
-        raise ValueError("Pattern prefix may only contain letters, digits, or hyphens")
-    return prefix, wildcard
-
-
-def load_wordlist(wordlist_path: str, max_len: int = None) -> list[str]:
-    """Load words from a wordlist file, optionally filtering by maximum length."""
+def load_wordlist(
+    wordlist_path: str,
+    max_len: int = None,
+    min_len: int = None,
+    use_index: bool = False,
+) -> list[str]:
+    """
+    Load the valid words of a wordlist file, optionally only those of length
+    ``min_len..max_len``.
+
+    With use_index, the words come from a length-bucketed index cached next to
+    the file (built on first use), so only the requested lengths are read.
+    """
     if not os.path.exists(wordlist_path):
         raise ValueError(f"Wordlist file not found: {wordlist_path}")
 
-    words = []
-    allowed = set(string.ascii_lowercase + string.digits + "-")
-
-    try:
-        with open(wordlist_path, "r", encoding="utf-8") as f:
-            for line_num, line in enumerate(f, 1):
-                word = line.strip().lower()
-                if not word:  # Skip empty lines
-                    continue
-
-                # Validate word contains only allowed characters
-                if any(ch not in allowed for ch in word):
-                    print(
-                        f"Warning: Skipping invalid word '{word}' at line {line_num} "
-                        f"(contains invalid characters for domain labels)",
-                        file=sys.stderr,
-                    )
-                    continue
-
-                # Filter by maximum length if specified
-                if max_len is not None and len(word) > max_len:
-                    continue
-
-                words.append(word)
-
-    except UnicodeDecodeError as e:
-        raise ValueError(f"Error reading wordlist file (encoding issue): {e}")
-    except IOError as e:
-        raise ValueError(f"Error reading wordlist file: {e}")
+    cached = read_index(wordlist_path, min_len or 1, max_len) if use_index else None
+    if cached is not None:
+        words, invalid = cached
+        warn_invalid(wordlist_path, invalid)
+    else:
+        try:
+            with open(wordlist_path, "r", encoding="utf-8") as f:
+                words, invalid, examples = parse_words(f.read())
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Error reading wordlist file (encoding issue): {e}")
+        except IOError as e:
+            raise ValueError(f"Error reading wordlist file: {e}")
+        warn_invalid(wordlist_path, invalid, examples)
+        if use_index:
+            try:
+                write_index(wordlist_path, words, invalid)
+            except OSError as e:
+                print(f"Warning: Could not write wordlist index: {e}", file=sys.stderr)
+        if min_len is not None or max_len is not None:
+            low, high = min_len or 1, max_len or float("inf")
+            words = [word for word in words if low <= len(word) <= high]
 
     if not words:
+        if min_len is not None or max_len is not None:
+            raise ValueError("No valid words of the requested length in wordlist file")
         raise ValueError("No valid words found in wordlist file")
 
     return words
 
 
 def generate_labels(
-    prefix: str, wildcard: bool, min_len: int, max_len: int, charset: str
+    prefix: str,
+    wildcard: bool,
+    min_len: int,
+    max_len: int,
+    charset: str,
+    start: int = 0,
 ) -> Iterable[str]:
-    for length in range(min_len, max_len + 1):
-        if length < len(prefix):
-            continue
-        suffix_len = length - len(prefix)
-        if suffix_len == 0:
-            yield prefix
-        elif wildcard:
-            for combo in itertools.product(charset, repeat=suffix_len):
-                yield prefix + "".join(combo)
-        elif length == len(prefix):
-            yield prefix
+    """Yield pattern-mode labels in order, optionally seeking to index ``start``."""
+    return Keyspace(prefix, wildcard, min_len, max_len, charset).iter_labels(start)
+
+
+def count_labels(
+    prefix: str, wildcard: bool, min_len: int, max_len: int, charset: str
+) -> int:
+    """Number of labels generate_labels() yields, computed without enumerating them."""
+    return Keyspace(prefix, wildcard, min_len, max_len, charset).total
 
 
 def generate_labels_from_wordlist(
-    words: list[str], min_len: int = None, max_len: int = None
-) -> list[str]:
+    words: Iterable[str], min_len: int = None, max_len: int = None
+) -> Iterator[str]:
     """Generate domain labels from a wordlist, optionally filtering by length."""
-    labels = []
     for word in words:
         word_len = len(word)
         # Apply length filters if specified
@@ -518,8 +839,24 @@ def generate_labels_from_wordlist(
             continue
         if max_len is not None and word_len > max_len:
             continue
-        labels.append(word)
-    return labels
+        yield word
+
+
+def shuffle_stream(
+    items: Iterable[str], buffer_size: int = 100_000, rng: random.Random = None
+) -> Iterator[str]:
+    """Randomize order using a bounded buffer instead of materializing the stream."""
+    rng = rng or random.Random()
+    buffer: list[str] = []
+    for item in items:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        idx = rng.randrange(buffer_size)
+        yield buffer[idx]
+        buffer[idx] = item
+    rng.shuffle(buffer)
+    yield from buffer
 
 
 def list_available_wordlists() -> None:
@@ -619,94 +956,86 @@ async def download_wordlist(
     return output_path
 
 
-async def check_domain(
-    session: aiohttp.ClientSession, fqdn: str, timeout: float, max_retries: int = 2
-) -> bool | None:
-    url = f"https://rdap.org/domain/{fqdn}"
+def report_result(lookup: LookupResult, stats: Stats, outputs: List = ()) -> None:
+    """Record one outcome in stats and every output writer."""
+    fqdn = lookup.fqdn
+    result = lookup.available
+    if result is True:
+        stats.add_available(fqdn)
+    elif result is False:
+        stats.add_registered(fqdn)
+    else:
+        stats.add_error(fqdn)
+        print(
+            f"Lookup failed for {fqdn} after {lookup.attempts} attempt(s): {lookup.error}",
+            file=sys.stderr,
+        )
+    if lookup.source == "dns":
+        stats.prefiltered += 1
+    for output in outputs:
+        output.record(lookup)
 
-    for attempt in range(max_retries + 1):
-        try:
-            async with session.get(
-                url, timeout=aiohttp.ClientTimeout(total=timeout)
-            ) as resp:
-                if resp.status == 404:
-                    return True
-                if resp.status == 200:
-                    return False
-                body = await resp.text()
-                print(
-                    f"Unexpected RDAP response {resp.status} for {fqdn}: {body[:200]}",
-                    file=sys.stderr,
-                )
-                return None
-        except asyncio.TimeoutError:
-            if attempt == max_retries:
-                print(
-                    f"Timeout querying {fqdn} after {max_retries + 1} attempts",
-                    file=sys.stderr,
-                )
-        except ssl.SSLError as exc:
-            if attempt == max_retries:
-                print(
-                    f"SSL error for {fqdn} after {max_retries + 1} attempts: {exc}",
-                    file=sys.stderr,
-                )
-            else:
-                # Small delay before retry for SSL errors
-                await asyncio.sleep(0.5 * (attempt + 1))
-        except aiohttp.ClientError as exc:
-            if attempt == max_retries:
-                print(
-                    f"Request error for {fqdn} after {max_retries + 1} attempts: {exc}",
-                    file=sys.stderr,
-                )
-            else:
-                # Small delay before retry
-                await asyncio.sleep(0.3 * (attempt + 1))
-        except Exception as exc:
-            if attempt == max_retries:
-                print(f"Unexpected error for {fqdn}: {exc}", file=sys.stderr)
-
-    return None
-
-
-async def worker(
-    queue: asyncio.Queue[str],
-    session: aiohttp.ClientSession,
-    limiter: RateLimiter,
-    timeout: float,
-    stats: Stats,
-    progress_manager: ProgressManager = None,
-    max_retries: int = 2,
-) -> None:
-    while True:
-        try:
-            label = await queue.get()
-        except asyncio.CancelledError:
-            return
-        if label is None:
-            queue.task_done()
-            break
-        fqdn = label
-        await stats.update_current(fqdn)
-        await limiter.wait()
-        result = await check_domain(session, fqdn, timeout, max_retries)
-        if result is True:
-            print(f"AVAILABLE  {fqdn}")
-            await stats.add_available(fqdn)
-        elif result is False:
-            await stats.add_registered(fqdn)
-        else:
-            await stats.add_error(fqdn)
 
-        # Mark domain as checked in progress manager
-        if progress_manager:
-            await progress_manager.mark_checked(fqdn)
+def parse_tlds(tld_arg: str, tld_file: str = None) -> list[str]:
+    """TLDs from a comma-separated --tld value or a one-per-line --tld-file."""
+    if tld_file:
+        try:
+            with open(tld_file, "r", encoding="utf-8") as f:
+                raw = [line.split("#", 1)[0] for line in f]
+        except IOError as e:
+            raise ValueError(f"Error reading TLD file: {e}")
+    else:
+        raw = tld_arg.split(",")
+    tlds = []
+    for tld in raw:
+        tld = tld.strip().lower().lstrip(".")
+        if tld and tld not in tlds:
+            tlds.append(tld)
+    if not tlds:
+        raise ValueError("No TLDs given")
+    return tlds
+
+
+def load_error_domains(path: str, fmt: str = None) -> list[str]:
+    """Domains whose latest outcome in a results file is an error, in file order."""
+    outcomes: Dict[str, str] = {}
+    for record in read_results(path, fmt):
+        fqdn = record.get("fqdn")
+        if fqdn:
+            # Later records win, so a file appended to by a recheck stays current
+            outcomes.pop(fqdn, None)
+            outcomes[fqdn] = record.get("outcome")
+    return [fqdn for fqdn, outcome in outcomes.items() if outcome == ERROR]
+
+
+def make_seen_set(args: argparse.Namespace, capacity: int) -> RecentSet | BloomFilter:
+    """Seen-set for combined-label deduplication, as chosen by --dedupe."""
+    if args.dedupe == "bloom":
+        if args.bloom_memory < 1:
+            raise ValueError("--bloom-memory must be at least 1")
+        seen = BloomFilter(
+            capacity, args.bloom_error_rate, max_bytes=args.bloom_memory * 2**20
+        )
+        if seen.capped:
+            print(
+                f"Warning: --dedupe bloom is capped at {args.bloom_memory} MB for "
+                f"{capacity} labels; up to {seen.error_rate:.2%} of unique labels may "
+                "be dropped as duplicates (raise --bloom-memory or use --dedupe recent)",
+                file=sys.stderr,
+            )
+        return seen
+    return RecentSet(args.dedupe_memory)
 
-        queue.task_done()
 
+def plan_domains(
+    args: argparse.Namespace,
+) -> tuple[Iterable[str], int, list[str], Keyspace | None, dict | None]:
+    """
+    Candidate FQDNs for a check run, with their count and TLDs.
 
-async def run(args: argparse.Namespace) -> None:
+    In pattern mode the Keyspace and its checkpoint fingerprint are returned too,
+    for index-based resume; both are None in wordlist mode.
+    """
     # Validate arguments based on mode (pattern vs wordlist)
     if args.wordlist and args.pattern:
         raise ValueError("Cannot specify both pattern and --wordlist. Choose one mode.")
@@ -725,20 +1054,41 @@ async def run(args: argparse.Namespace) -> None:
         raise ValueError("--min cannot be greater than --max")
 
     # Generate labels based on mode
-    if args.wordlist:
+    keyspace = None
+    fingerprint = None
+    combine = args.prefixes or args.suffixes or args.compound != 1
+    if combine and not args.wordlist:
+        raise ValueError("--prefixes, --suffixes and --compound need --wordlist")
+    if args.wordlist and combine:
+        # Combination mode: prefixes x words (x words ...) x suffixes
+        if args.compound < 1:
+            raise ValueError("--compound must be at least 1")
+        words = load_wordlist(args.wordlist, max_len, use_index=args.wordlist_index)
+        slots = [words] * args.compound
+        if args.prefixes:
+            slots.insert(0, parse_affixes(args.prefixes))
+        if args.suffixes:
+            slots.append(parse_affixes(args.suffixes))
+        combinator = Combinator(slots, min_len, max_len)
+        original_total = combinator.total
+        print(
+            f"Combining {len(words)} words in {len(slots)} slots: up to "
+            f"{original_total} labels of length {min_len}-{max_len}",
+            file=sys.stderr,
+        )
+        # Duplicates are dropped as they stream, so this is an upper bound
+        labels = dedupe(combinator, make_seen_set(args, original_total))
+    elif args.wordlist:
         # Wordlist mode
-        words = load_wordlist(args.wordlist, max_len)
-        labels = generate_labels_from_wordlist(words, min_len, max_len)
+        words = load_wordlist(args.wordlist, max_len, min_len, args.wordlist_index)
+        labels = words
+        original_total = len(words)
         print(
-            f"Loaded {len(words)} words from wordlist, {len(labels)} match length criteria",
+            f"Loaded {original_total} words of length {min_len}-{max_len} from wordlist",
             file=sys.stderr,
         )
     else:
-        # Pattern mode (existing logic)
-        prefix, wildcard = validate_pattern(args.pattern)
-        if not wildcard and (min_len != len(prefix) or max_len != len(prefix)):
-            raise ValueError("Pattern without '*' only supports exact length lookups")
-
+        # Pattern mode
         charset = args.charset.lower()
         if not charset:
             raise ValueError("--charset cannot be empty")
@@ -749,33 +1099,155 @@ async def run(args: argparse.Namespace) -> None:
                 + "".join(sorted(invalid_chars))
             )
 
-        labels = list(generate_labels(prefix, wildcard, min_len, max_len, charset))
+        keyspace = compile_pattern(args.pattern, min_len, max_len, charset)
+        if not keyspace.total:
+            raise ValueError(
+                f"Pattern '{args.pattern}' matches no labels of length {min_len}-{max_len}"
+            )
+        labels = keyspace.iter_labels()
+        original_total = keyspace.total
+        if isinstance(keyspace, Keyspace):
+            # Unchanged for prefix patterns, so their checkpoints still resume
+            fingerprint = {
+                "prefix": keyspace.prefix,
+                "wildcard": keyspace.wildcard,
+                "min": min_len,
+                "max": max_len,
+                "charset": charset,
+            }
+        else:
+            fingerprint = {
+                "pattern": keyspace.pattern,
+                "min": min_len,
+                "max": max_len,
+                "charset": charset,
+            }
+
+    shard_index, shard_count = parse_shard(args.shard) if args.shard else (0, 1)
+    if shard_count > 1:
+        labels = itertools.islice(labels, shard_index, None, shard_count)
+        original_total = shard_size(original_total, shard_index, shard_count)
+        print(
+            f"Shard {shard_index}/{shard_count}: {original_total} candidates",
+            file=sys.stderr,
+        )
 
-    if not labels:
+    if not original_total:
         raise ValueError("No domain labels generated with the provided arguments")
 
-    fqdn_labels = [f"{label}.{args.tld.lower()}" for label in labels]
+    # Each label is generated once and fanned out across every TLD
+    tlds = parse_tlds(args.tld, args.tld_file)
+    domains: Iterable[str] = (f"{label}.{tld}" for label in labels for tld in tlds)
+    original_total *= len(tlds)
+    if len(tlds) > 1:
+        print(f"Checking {len(tlds)} TLDs: {', '.join(tlds)}", file=sys.stderr)
+    if fingerprint:
+        fingerprint.update(tld=",".join(tlds), shard=f"{shard_index}/{shard_count}")
+    return domains, original_total, tlds, keyspace, fingerprint
+
+
+async def run(args: argparse.Namespace) -> None:
+    shard_index, shard_count = parse_shard(args.shard) if args.shard else (0, 1)
+    if args.command == "recheck":
+        keyspace = fingerprint = None
+        domains = load_error_domains(args.previous, args.previous_format)
+        if not domains:
+            print(
+                f"No errored lookups in {args.previous}; nothing to recheck",
+                file=sys.stderr,
+            )
+            return
+        original_total = len(domains)
+        tlds = list(dict.fromkeys(fqdn.partition(".")[2] for fqdn in domains))
+        print(
+            f"Re-checking {original_total} domains that errored in {args.previous}",
+            file=sys.stderr,
+        )
+    else:
+        domains, original_total, tlds, keyspace, fingerprint = plan_domains(args)
 
     # Initialize progress manager for checkpoint/resume functionality
     progress_manager = None
-    original_total = len(fqdn_labels)
+    already_checked = 0
     if args.resume or args.progress_file:
-        progress_manager = ProgressManager(args.progress_file)
-        if args.resume and progress_manager.checked_domains:
+        checkpoint_mode = args.checkpoint
+        if checkpoint_mode == "auto":
+            # Index ranges only work for an ordered keyspace, and an existing
+            # domain-set or Bloom checkpoint keeps its format
+            existing = detect_checkpoint_format(args.progress_file)
+            use_keyspace = keyspace is not None and not args.shuffle
+            if existing == "bloom":
+                checkpoint_mode = "bloom"
+            elif use_keyspace and existing != "domains":
+                checkpoint_mode = "keyspace"
+            else:
+                checkpoint_mode = "domains"
+        elif checkpoint_mode == "keyspace" and (keyspace is None or args.shuffle):
+            raise ValueError(
+                "--checkpoint keyspace requires pattern mode without --shuffle"
+            )
+
+        if checkpoint_mode == "keyspace":
+            progress_manager = KeyspaceProgress(
+                args.progress_file,
+                fingerprint,
+                args.checkpoint_batch,
+                args.checkpoint_interval,
+            )
+            try:
+                progress_manager.load(strict=args.resume)
+            except (json.JSONDecodeError, IOError) as e:
+                raise ValueError(f"Error loading progress file {args.progress_file}: {e}")
+            already_checked = progress_manager.completed_count(
+                len(tlds), shard_index, shard_count
+            )
+            # Seek straight past finished work instead of filtering it
+            domains = progress_manager.iter_domains(
+                keyspace, tlds, shard_index, shard_count
+            )
+        elif checkpoint_mode == "bloom":
+            progress_manager = BloomProgress(
+                args.progress_file,
+                original_total,
+                args.bloom_error_rate,
+                args.bloom_confirm,
+                args.checkpoint_batch,
+                args.checkpoint_interval,
+            )
+            try:
+                progress_manager.load()
+            except (json.JSONDecodeError, IOError) as e:
+                raise ValueError(f"Error loading progress file {args.progress_file}: {e}")
+            already_checked = progress_manager.checked_count
+        else:
+            progress_manager = ProgressManager(
+                args.progress_file, args.checkpoint_batch, args.checkpoint_interval
+            )
+            already_checked = progress_manager.checked_count
+
+        if args.resume and already_checked:
+            print(
+                f"Resuming from checkpoint: {already_checked} domains already checked",
+                file=sys.stderr,
+            )
+        # A Bloom checkpoint only holds what succeeded, so it cannot tell
+        failed_before = getattr(progress_manager, "failed_count", 0)
+        if args.resume and failed_before:
             print(
-                f"Resuming from checkpoint: {len(progress_manager.checked_domains)} domains already checked",
+                f"Retrying {failed_before} domains whose lookups failed last time",
                 file=sys.stderr,
             )
-        # Filter out already checked domains
-        fqdn_labels = progress_manager.get_unchecked_domains(fqdn_labels)
 
     # Shuffle domains if requested
     if args.shuffle:
-        random.shuffle(fqdn_labels)
-        print("Domain order shuffled randomly", file=sys.stderr)
+        domains = shuffle_stream(domains, args.shuffle_buffer)
+        print(
+            f"Domain order shuffled randomly (window of {args.shuffle_buffer})",
+            file=sys.stderr,
+        )
 
-    remaining_total = len(fqdn_labels)
-    if progress_manager and progress_manager.checked_domains:
+    remaining_total = max(original_total - already_checked, 0)
+    if already_checked:
         print(
             f"Planned lookups: {remaining_total} domains (remaining), {original_total} total",
             file=sys.stderr,
@@ -783,66 +1255,262 @@ async def run(args: argparse.Namespace) -> None:
     else:
         print(f"Planned lookups: {remaining_total} domains", file=sys.stderr)
 
-    limiter = RateLimiter(args.rate if args.rate > 0 else None)
-    queue: asyncio.Queue[str] = asyncio.Queue()
-    stats = Stats(remaining_total, not args.no_progress, args.output)
-    for fqdn in fqdn_labels:
-        queue.put_nowait(fqdn)
-    for _ in range(args.concurrency):
-        queue.put_nowait(None)
+    resolver = None
+    if args.dns_prefilter:
+        resolver = DnsResolver(parse_server(args.dns_resolver), args.dns_timeout)
+    cache = None
+    if args.cache:
+        cache = ResultCache(
+            args.cache,
+            ttl_registered=args.cache_ttl_registered * 3600,
+            ttl_available=args.cache_ttl_available * 3600,
+            ttl_error=args.cache_ttl_error * 3600,
+        )
+    try:
+        # Checker names its parameters; report the flags the user actually typed
+        if args.concurrency < 1:
+            raise ValueError("--concurrency must be at least 1")
+        if args.burst < 1:
+            raise ValueError("--burst must be at least 1")
+        if args.adaptive_rate and not args.rate:
+            raise ValueError("--adaptive-rate needs a starting --rate")
+        if args.retries < 0:
+            raise ValueError("--retries cannot be negative")
+        if args.dns_prefilter and args.dns_concurrency < 1:
+            raise ValueError("--dns-concurrency must be at least 1")
+        if args.transport == "http2" and args.max_streams < 1:
+            raise ValueError("--max-streams must be at least 1")
+        if args.warm_up < 0:
+            raise ValueError("--warm-up cannot be negative")
+        shutdown = GracefulShutdown(args.shutdown_timeout)
+        checker = Checker(
+            concurrency=args.concurrency,
+            rate=args.rate,
+            burst=args.burst,
+            adaptive_rate=args.adaptive_rate,
+            max_rate=args.max_rate,
+            timeout=args.timeout,
+            retries=args.retries,
+            retry_base_delay=args.retry_base_delay,
+            retry_max_delay=args.retry_max_delay,
+            retry_on=parse_retry_classes(args.retry_on),
+            final_retry_pass=args.final_retry_pass,
+            rdap_url=args.rdap_url,
+            bootstrap=(
+                RdapBootstrap.from_file(args.rdap_bootstrap)
+                if args.rdap_bootstrap and not args.rdap_url
+                else None
+            ),
+            bootstrap_cache=args.bootstrap_cache,
+            bootstrap_ttl=args.bootstrap_ttl,
+            transport=args.transport,
+            max_streams=args.max_streams,
+            use_head=not args.no_head,
+            # Expiry dates and status flags go into result files
+            details=bool(args.results),
+            cache=cache,
+            checkpoint=progress_manager,
+            resolver=resolver,
+            dns_concurrency=args.dns_concurrency,
+        )
+    except ValueError:
+        if cache:
+            cache.close()
+        raise
+    # Every outcome goes to each output; a resumed run or a recheck appends to
+    # earlier results
+    append = args.resume or args.command == "recheck"
+    outputs = []
+    results = None
+    matrix = None
+    available_list = None
+    try:
+        if args.results:
+            results = open_result_writer(args.results, args.results_format, append)
+            outputs.append(results)
+        if args.matrix:
+            expected = None
+            if args.command == "recheck":
+                # Only the TLDs that errored are looked up again for a label
+                expected = Counter(fqdn.partition(".")[0] for fqdn in domains)
+            matrix = AvailabilityMatrix(args.matrix, tlds, append, expected)
+            outputs.append(matrix)
+    except ValueError:
+        for output in outputs:
+            output.close()
+        if cache:
+            cache.close()
+        raise
+    if args.output:
+        try:
+            available_list = AvailableListWriter(args.output, "a" if append else "w")
+            outputs.append(available_list)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+    stats = Stats(remaining_total, not args.no_progress)
+    stats.start()
+    metrics = checker.metrics
+    metrics_server = None
+    metrics.add_collector(
+        "rchecker_lookups",
+        "counter",
+        "Finished domains by outcome.",
+        lambda: {
+            (("outcome", outcome),): stats.snapshot()[key]
+            for outcome, key in (
+                (AVAILABLE, "available"),
+                (REGISTERED, "registered"),
+                (ERROR, "errors"),
+            )
+        },
+    )
+    metrics.add_collector(
+        "rchecker_dns_prefiltered",
+        "counter",
+        "Domains reported registered by the DNS pre-filter without an RDAP lookup.",
+        lambda: {(): stats.prefiltered},
+    )
 
-    # Create SSL context with more lenient settings
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
+    interrupted = False
+    finished = False
+    shutdown.install()
+    try:
+        async with checker:
+            hosts = dict.fromkeys(checker.registry(tld) for tld in tlds)
+            if len(hosts) > 1:
+                print(
+                    f"Querying {len(hosts)} registries with up to {args.concurrency} requests in flight",
+                    file=sys.stderr,
+                )
+            if args.warm_up:
+                await checker.warm_up(tlds, args.warm_up)
+            if args.metrics_port:
+                metrics_server = await serve_metrics(metrics, args.metrics_port)
+
+            lookups = checker.check(domains)
+
+            async def consume() -> None:
+                async for lookup in lookups:
+                    report_result(lookup, stats, outputs)
 
-    connector = aiohttp.TCPConnector(
-        limit=args.concurrency,
-        ssl=ssl_context,
-        ttl_dns_cache=300,  # DNS cache for 5 minutes
-        use_dns_cache=True,
-        keepalive_timeout=30,
-        enable_cleanup_closed=True,
-    )
-
-    async with aiohttp.ClientSession(
-        connector=connector,
-        headers={"User-Agent": "domain-checker/0.1"},
-        timeout=aiohttp.ClientTimeout(total=args.timeout),
-    ) as session:
-        workers = [
-            asyncio.create_task(
-                worker(
-                    queue,
-                    session,
-                    limiter,
-                    args.timeout,
-                    stats,
-                    progress_manager,
-                    args.retries,
+            consuming = asyncio.create_task(consume())
+            signalled = asyncio.create_task(shutdown.requested.wait())
+            try:
+                await asyncio.wait(
+                    {consuming, signalled}, return_when=asyncio.FIRST_COMPLETED
                 )
-            )
-            for _ in range(args.concurrency)
-        ]
-        await queue.join()
-        for w in workers:
-            w.cancel()
-        await asyncio.gather(*workers, return_exceptions=True)
+                if not consuming.done():
+                    interrupted = True
+                    checker.stop()
+                    if not await shutdown.drain([consuming]):
+                        print(
+                            "Lookups still in flight were abandoned; "
+                            "they will be retried on resume",
+                            file=sys.stderr,
+                        )
+                if consuming.done():
+                    consuming.result()
+                finished = not interrupted
+            finally:
+                consuming.cancel()
+                signalled.cancel()
+                await asyncio.gather(consuming, signalled, return_exceptions=True)
+                await lookups.aclose()
+    finally:
+        shutdown.remove()
+        # The checker has saved the checkpoint; flush the outputs as well
+        stats.close()
+        if matrix and progress_manager and not finished:
+            # Labels cut short are completed by the resumed run
+            matrix.suspend()
+        for output in outputs:
+            output.close()
+        if metrics_server:
+            metrics_server.close()
 
     # Clean up progress file after successful completion
-    if progress_manager:
+    if progress_manager and not interrupted:
         progress_manager.cleanup()
         print(
             "Progress checkpoint cleared after successful completion", file=sys.stderr
         )
 
-    stats.close()
     print(
-        "\nFinished. Available: {0}, registered: {1}, errors: {2}".format(
-            stats.available, stats.registered, stats.errors
+        "\n{0}. Available: {1}, registered: {2}, errors: {3}".format(
+            "Interrupted" if interrupted else "Finished",
+            stats.available,
+            stats.registered,
+            stats.errors,
         ),
         file=sys.stderr,
     )
+    if available_list:
+        if stats.available > 0:
+            print(f"Available domains saved to: {args.output}", file=sys.stderr)
+        else:
+            print("No available domains found.", file=sys.stderr)
+    if results:
+        print(
+            f"Results for {results.lines} lookups saved to: {args.results}",
+            file=sys.stderr,
+        )
+    if matrix:
+        print(
+            f"Availability matrix ({matrix.rows} labels) saved to: {args.matrix}",
+            file=sys.stderr,
+        )
+    for line in metrics.summary(stats.completed):
+        print(line, file=sys.stderr)
+    if checker.retried:
+        print(
+            f"Retried {checker.retried} failed requests after backoff",
+            file=sys.stderr,
+        )
+    if cache and cache.hits:
+        print(f"Answered from result cache: {cache.hits} domains", file=sys.stderr)
+    if resolver:
+        print(
+            f"DNS pre-filter saved {stats.prefiltered} RDAP lookups "
+            f"({resolver.queries} queries, {resolver.failures} unanswered)",
+            file=sys.stderr,
+        )
+    if args.adaptive_rate:
+        for line in checker.limiter.report():
+            print(f"Effective rate {line}", file=sys.stderr)
+    if interrupted:
+        if progress_manager:
+            print(
+                f"Checkpoint saved to {args.progress_file} after {stats.completed} "
+                f"of {remaining_total} planned lookups; continue with:\n"
+                f"  {resume_command(sys.argv[1:])}",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                "No checkpoint was kept (--progress-file is empty); "
+                "a new run starts from the beginning",
+                file=sys.stderr,
+            )
+        raise ScanInterrupted(shutdown.signum)
+
+
+def resume_command(argv: List[str]) -> str:
+    """The command line that continues an interrupted scan."""
+    argv = list(argv)
+    if "--resume" not in argv:
+        argv.append("--resume")
+    return shlex.join(["rchecker", *argv])
+
+
+def _run_shard(args: argparse.Namespace) -> None:
+    """Entry point of a --workers child process."""
+    try:
+        asyncio.run(run(args))
+    except ValueError as exc:
+        print(f"Error (shard {args.shard}): {exc}", file=sys.stderr)
+        sys.exit(1)
+    except ScanInterrupted as exc:
+        sys.exit(exc.exit_code)
 
 
 def main() -> None:
@@ -850,11 +1518,25 @@ def main() -> None:
     try:
         if args.command == "download":
             asyncio.run(download_wordlist(args.wordlist_name, args.output, args.force))
+        elif args.command == "bench":
+            run_bench(args)
+        elif args.workers > 1:
+            if args.shard:
+                raise ValueError("--workers already assigns shards; drop --shard")
+            if supervise(args, _run_shard):
+                sys.exit(1)
         else:  # check command (default)
             asyncio.run(run(args))
     except ValueError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         sys.exit(1)
+    except ScanInterrupted as exc:
+        sys.exit(exc.exit_code)
+    except KeyboardInterrupt:
+        # Only reached where the loop cannot handle signals itself; the
+        # checkpoint was still closed on the way out
+        print("\nInterrupted", file=sys.stderr)
+        sys.exit(130)
 
 
 if __name__ == "__main__":
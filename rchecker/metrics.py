@@ -0,0 +1,225 @@
+"""
+Runtime metrics: counters and histograms, exposed in the Prometheus text format.
+
+Instruments are updated from the event loop thread only, so they are plain
+numbers without locks. Values that already live elsewhere (outcome counts in
+Stats, queue depths) are read through collector callbacks at scrape time rather
+than duplicated in the hot path.
+"""
+
+import asyncio
+import bisect
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .result import LookupResult
+
+# Roughly 25% apart from 1 ms to 2 min: fine enough for useful p99 estimates
+LATENCY_BUCKETS = tuple(round(0.001 * 1.25**i, 6) for i in range(53))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter, optionally split by one set of labels."""
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def items(self) -> List[Tuple[Labels, float]]:
+        return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        # Text format 0.0.4 types the sample's own name, suffix included
+        name = f"{self.name}_total"
+        lines = [f"# HELP {name} {self.help}", f"# TYPE {name} counter"]
+        for labels, value in self.items():
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram with quantile estimates by linear interpolation."""
+
+    def __init__(
+        self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the q-quantile (0..1), as Prometheus' histogram_quantile does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self._counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum:g}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+def classify_error(error: str | None) -> str:
+    """Coarse error type from a LookupResult error string."""
+    if not error:
+        return "none"
+    if error == "timeout":
+        return "timeout"
+    if error.startswith("HTTP "):
+        return "http"
+    return error.split(":", 1)[0]  # "ssl", "request" or "unexpected"
+
+
+class Metrics:
+    """The instruments recorded by a run, plus collectors read at scrape time."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.latency = Histogram(
+            "rchecker_lookup_latency_seconds",
+            "RDAP lookup latency per domain, summed over retries, excluding rate "
+            "limit waits and backoff.",
+        )
+        self.limiter_wait = Histogram(
+            "rchecker_limiter_wait_seconds",
+            "Time each lookup spent waiting for rate limit permits, over retries.",
+        )
+        self.responses = Counter(
+            "rchecker_lookup_status", "Lookups by final HTTP status (none = no response)."
+        )
+        self.errors = Counter(
+            "rchecker_lookup_errors",
+            "Failed lookups by final error type (timeout, ssl, request, http, unexpected).",
+        )
+        self._collectors: List[tuple] = []
+
+    def observe(self, result: LookupResult) -> None:
+        """Record the final outcome of one RDAP lookup."""
+        self.latency.observe(result.latency)
+        self.limiter_wait.observe(result.limiter_wait)
+        self.responses.inc(status=str(result.status or "none"))
+        if result.available is None:
+            self.errors.inc(type=classify_error(result.error))
+
+    def add_collector(
+        self,
+        name: str,
+        kind: str,
+        help: str,
+        collect: Callable[[], Dict[Labels, float]],
+    ) -> None:
+        """Expose values computed at scrape time; ``kind`` is "counter" or "gauge"."""
+        self._collectors.append((name, kind, help, collect))
+
+    def rate(self, completed: int) -> float:
+        elapsed = time.monotonic() - self.started
+        return completed / elapsed if elapsed > 0 else 0.0
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, kind, help, collect in self._collectors:
+            if kind == "counter":
+                name += "_total"
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(collect().items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for instrument in (self.responses, self.errors, self.latency, self.limiter_wait):
+            lines.extend(instrument.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self, completed: int) -> List[str]:
+        """Human-readable latency percentiles and throughput for the final report."""
+        lines = [f"Throughput: {self.rate(completed):.1f} domains/s"]
+        if self.latency.count:
+            p50, p95, p99 = (self.latency.quantile(q) for q in (0.5, 0.95, 0.99))
+            lines.append(
+                f"Lookup latency: p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, "
+                f"p99 {p99 * 1000:.0f} ms over {self.latency.count} RDAP lookups"
+            )
+        if self.errors.total():
+            breakdown = ", ".join(
+                f"{dict(labels)['type']} {value:g}"
+                for labels, value in self.errors.items()
+            )
+            lines.append(f"Lookup errors: {breakdown}")
+        return lines
+
+
+async def serve_metrics(
+    metrics: Metrics, port: int, host: str = "127.0.0.1"
+) -> asyncio.AbstractServer:
+    """Serve ``GET /metrics`` in the Prometheus text format."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5.0)
+            # Drain the headers; the request has no body we care about
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5.0)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            method, _, rest = request.decode("latin-1").partition(" ")
+            path = rest.split(" ", 1)[0].split("?", 1)[0]
+            if method == "GET" and path in ("/", "/metrics"):
+                status, body = "200 OK", metrics.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Serving metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    return server
@@ -0,0 +1,460 @@
+"""
+Result outputs: the list of available domains, full per-lookup result files and
+the availability matrix.
+
+Writers that see every lookup are built on BackgroundWriter, which moves file
+and terminal writes off the event loop: callers only append to an in-memory
+queue, and a writer thread encodes and writes items in batches, flushing on size
+or interval. Each output exposes ``record(result)`` and ``close()``;
+``read_results`` reads any result file back, e.g. for ``rchecker recheck``.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import queue
+import stat
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, TextIO
+
+from .result import RESULT_FIELDS, LookupResult
+
+
+def _fsync(fd: int) -> None:
+    """fsync a regular file; pipes, FIFOs and devices such as /dev/null reject it."""
+    if stat.S_ISREG(os.fstat(fd).st_mode):
+        os.fsync(fd)
+
+
+class BackgroundWriter:
+    """
+    Writer whose encoding and disk I/O run on a dedicated thread.
+
+    ``write`` never blocks. Items are written in batches of ``batch_size`` or
+    every ``flush_interval`` seconds, whichever comes first; ``close`` drains the
+    queue and, for regular files, fsyncs before returning. ``target`` is a path (opened
+    with ``mode``) or an already open stream such as ``sys.stdout``, which is
+    flushed but left open. Subclasses change the encoding or file format by
+    overriding ``_open``, ``_encode``, ``_write_batch`` and ``_finish``.
+    """
+
+    def __init__(
+        self,
+        target: str | TextIO,
+        mode: str = "w",
+        batch_size: int = 1000,
+        flush_interval: float = 0.5,
+    ) -> None:
+        if isinstance(target, str):
+            self.name = target
+            self._handle = self._open(target, mode)
+            self._owned = True
+        else:
+            self.name = getattr(target, "name", "<stream>")
+            self._handle = target
+            self._owned = False
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.lines = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._failed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"writer:{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def _open(self, path: str, mode: str):
+        return open(path, mode, encoding="utf-8", newline="")
+
+    def write(self, item: Any) -> None:
+        """Queue one item (a line without trailing newline, by default)."""
+        if not self._closed:
+            self.lines += 1
+            self._queue.put(item)
+
+    def _run(self) -> None:
+        batch: List[Any] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                if item is None:
+                    self._flush(batch, final=True)
+                    return
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _encode(self, item: Any) -> str:
+        return f"{item}\n"
+
+    def _write_batch(self, batch: List[Any]) -> None:
+        self._handle.write("".join(self._encode(item) for item in batch))
+        self._handle.flush()
+
+    def _finish(self) -> None:
+        """Write anything held back for the final flush (e.g. a partial row group)."""
+
+    def _sync(self) -> None:
+        _fsync(self._handle.fileno())
+
+    def _flush(self, batch: List[Any], final: bool = False) -> None:
+        if self._failed:
+            return
+        try:
+            if batch:
+                self._write_batch(batch)
+            if final:
+                self._finish()
+                if self._owned:
+                    self._sync()
+        except (IOError, ValueError) as e:
+            # Report once; the lookup path keeps going without this output
+            self._failed = True
+            print(f"Error writing to {self.name}: {e}", file=sys.stderr)
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self._owned:
+            self._handle.close()
+
+
+class ResultWriter(BackgroundWriter):
+    """Streams LookupResults to a file; subclasses pick the encoding."""
+
+    def __init__(self, path: str, mode: str = "w", batch_size: int = 1000) -> None:
+        try:
+            super().__init__(path, mode, batch_size)
+        except IOError as e:
+            raise ValueError(f"Error opening result file {path}: {e}")
+
+    def record(self, result: LookupResult) -> None:
+        self.write(result)
+
+
+class AvailableListWriter(ResultWriter):
+    """The classic output: one available domain per line."""
+
+    def record(self, result: LookupResult) -> None:
+        if result.available is True:
+            self.write(result)
+
+    def _encode(self, result: LookupResult) -> str:
+        return f"{result.fqdn}\n"
+
+
+class JsonlWriter(ResultWriter):
+    """One JSON object per lookup."""
+
+    def _encode(self, result: LookupResult) -> str:
+        return json.dumps(result.as_record(), separators=(",", ":")) + "\n"
+
+
+class CsvWriter(ResultWriter):
+    """One CSV row per lookup, with a header row at the start of the file."""
+
+    def _open(self, path: str, mode: str):
+        handle = super()._open(path, mode)
+        self._csv = csv.writer(handle)
+        if handle.tell() == 0:
+            self._csv.writerow(RESULT_FIELDS)
+        return handle
+
+    def _write_batch(self, batch: List[LookupResult]) -> None:
+        self._csv.writerows(
+            [record[field] for field in RESULT_FIELDS]
+            for record in (result.as_record() for result in batch)
+        )
+        self._handle.flush()
+
+
+class ColumnarWriter(ResultWriter):
+    """
+    Compact column-oriented batches, one gzip-compressed JSON row group per line.
+
+    Each line is ``{"rows": n, "columns": {field: [values...]}}``. Only the row
+    group being filled is held in memory, and appending (e.g. on --resume) adds a
+    new gzip member, which readers decompress as one stream.
+    """
+
+    def __init__(
+        self, path: str, mode: str = "w", row_group_size: int = 65536
+    ) -> None:
+        self.row_group_size = max(1, row_group_size)
+        self._columns: Dict[str, list] = {field: [] for field in RESULT_FIELDS}
+        self._rows = 0
+        self.row_groups = 0
+        super().__init__(path, mode)
+
+    def _open(self, path: str, mode: str):
+        self._raw = open(path, mode + "b")
+        compressed = gzip.GzipFile(fileobj=self._raw, mode=mode + "b")
+        return io.TextIOWrapper(compressed, encoding="utf-8")
+
+    def _write_batch(self, batch: List[LookupResult]) -> None:
+        columns = self._columns
+        for result in batch:
+            for field, value in result.as_record().items():
+                columns[field].append(value)
+            self._rows += 1
+            if self._rows >= self.row_group_size:
+                self._emit()
+
+    def _finish(self) -> None:
+        if self._rows:
+            self._emit()
+
+    def _emit(self) -> None:
+        self._write_group(self._columns, self._rows)
+        self._columns = {field: [] for field in RESULT_FIELDS}
+        self._rows = 0
+        self.row_groups += 1
+
+    def _write_group(self, columns: Dict[str, list], rows: int) -> None:
+        group = {"rows": rows, "columns": columns}
+        self._handle.write(json.dumps(group, separators=(",", ":")) + "\n")
+        self._handle.flush()
+
+    def _sync(self) -> None:
+        # Closing the gzip stream writes its trailer; the file itself stays open
+        self._handle.close()
+        self._raw.flush()
+        _fsync(self._raw.fileno())
+
+    def close(self) -> None:
+        super().close()
+        self._raw.close()
+
+
+class ParquetWriter(ColumnarWriter):
+    """Apache Parquet output, one row group per batch; needs the optional pyarrow."""
+
+    def _open(self, path: str, mode: str):
+        if mode != "w":
+            raise ValueError("Parquet result files cannot be appended to")
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError(
+                "Parquet output needs pyarrow (pip install 'rchecker[parquet]')"
+            )
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("fqdn", pa.string()),
+                ("outcome", pa.string()),
+                ("status", pa.int32()),
+                ("latency_ms", pa.float64()),
+                ("attempts", pa.int32()),
+                ("source", pa.string()),
+                ("expires_at", pa.float64()),
+                ("checked_at", pa.float64()),
+                ("error", pa.string()),
+                ("rdap_status", pa.string()),
+            ]
+        )
+        return pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def _write_group(self, columns: Dict[str, list], rows: int) -> None:
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        self._handle.write_table(table)
+
+    def _sync(self) -> None:
+        # ParquetWriter writes its footer on close()
+        pass
+
+    def close(self) -> None:
+        ResultWriter.close(self)
+
+
+RESULT_FORMATS = {
+    "text": AvailableListWriter,
+    "jsonl": JsonlWriter,
+    "csv": CsvWriter,
+    "columnar": ColumnarWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def result_format_for(path: str) -> str:
+    """Pick a result format from the file name."""
+    name = path.lower()
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".parquet"):
+        return "parquet"
+    if name.endswith(".gz"):
+        return "columnar"
+    raise ValueError(
+        f"Cannot tell the format of {path}; pass --results-format "
+        f"({', '.join(RESULT_FORMATS)})"
+    )
+
+
+def open_result_writer(
+    path: str, fmt: str = None, append: bool = False
+) -> ResultWriter:
+    """Open a result writer for ``path`` in ``fmt`` (inferred from the name if omitted)."""
+    cls = RESULT_FORMATS[fmt or result_format_for(path)]
+    return cls(path, "a" if append else "w")
+
+
+def read_results(path: str, fmt: str = None) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a result file written by one of the writers above."""
+    fmt = fmt or result_format_for(path)
+    if fmt not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format '{fmt}'")
+    if fmt == "text":
+        raise ValueError(
+            f"{path} lists only available domains; use a --results file instead"
+        )
+    try:
+        if fmt == "jsonl":
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        elif fmt == "csv":
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                yield from csv.DictReader(f)
+        elif fmt == "columnar":
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    columns = json.loads(line)["columns"]
+                    for values in zip(*columns.values()):
+                        yield dict(zip(columns, values))
+        else:
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError(
+                    "Reading Parquet needs pyarrow (pip install 'rchecker[parquet]')"
+                )
+            for batch in pq.ParquetFile(path).iter_batches():
+                yield from batch.to_pylist()
+    except (IOError, EOFError, json.JSONDecodeError, KeyError) as e:
+        raise ValueError(f"Error reading result file {path}: {e}")
+
+
+class AvailabilityMatrix(BackgroundWriter):
+    """
+    Per-label availability across TLDs, written as CSV.
+
+    A row is queued as soon as every TLD for its label has reported, so only
+    labels with lookups still in flight are held in memory. ``expected`` maps a
+    label to the number of TLDs it will report, for runs such as ``recheck``
+    where that differs per label; by default every label reports every TLD.
+
+    Appending (``--resume``, ``recheck``) keeps the existing header, whose TLDs
+    must include ``tlds``; a label re-checked later gets a new row holding only
+    the cells that run looked up, which supersede the earlier ones. Labels still
+    unfinished when a suspended matrix closes are saved to ``<path>.partial``
+    and picked up by the next append, so an interrupted label is written once,
+    whole, by the resumed run.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        tlds: List[str],
+        append: bool = False,
+        expected: Dict[str, int] | None = None,
+    ) -> None:
+        self.path = path
+        self.tlds = tlds
+        self.columns = tlds
+        self.expected = expected
+        self.partial_path = path + ".partial"
+        self._pending: Dict[str, Dict[str, str]] = {}
+        self._suspended = False
+        try:
+            super().__init__(path, "a" if append else "w")
+        except IOError as e:
+            raise ValueError(f"Error opening matrix file {path}: {e}")
+
+    def _open(self, path: str, mode: str):
+        if mode == "a" and os.path.exists(path):
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), None)
+            if header:
+                missing = [tld for tld in self.tlds if tld not in header[1:]]
+                if missing:
+                    raise ValueError(
+                        f"Matrix file {path} has no column for {', '.join(missing)}; "
+                        "choose another --matrix"
+                    )
+                self.columns = header[1:]
+        if mode == "a" and os.path.exists(self.partial_path):
+            try:
+                with open(self.partial_path, "r", encoding="utf-8") as f:
+                    self._pending = json.load(f)
+            except (IOError, json.JSONDecodeError) as e:
+                raise ValueError(f"Error reading {self.partial_path}: {e}")
+        handle = super()._open(path, mode)
+        self._csv = csv.writer(handle)
+        if handle.tell() == 0:
+            self._csv.writerow(["label"] + self.columns)
+        return handle
+
+    @property
+    def rows(self) -> int:
+        return self.lines
+
+    def record(self, result: LookupResult) -> None:
+        label, _, tld = result.fqdn.partition(".")
+        row = self._pending.setdefault(label, {})
+        row[tld] = result.outcome
+        needed = self.expected[label] if self.expected else len(self.tlds)
+        if len(row) >= needed:
+            del self._pending[label]
+            self.write((label, row))
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        columns = self.columns
+        self._csv.writerows(
+            [label] + [row.get(tld, "") for tld in columns] for label, row in batch
+        )
+        self._handle.flush()
+
+    def suspend(self) -> None:
+        """Save unfinished labels for a resumed run instead of writing them on close."""
+        self._suspended = True
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        if self._pending and self._suspended:
+            tmp = self.partial_path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._pending, f, separators=(",", ":"))
+                os.replace(tmp, self.partial_path)
+            except IOError as e:
+                print(f"Error saving {self.partial_path}: {e}", file=sys.stderr)
+        else:
+            # Finished (or not resumable): what is left keeps blank cells
+            for label, row in self._pending.items():
+                self.write((label, row))
+            if os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+        self._pending.clear()
+        super().close()
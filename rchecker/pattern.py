@@ -0,0 +1,283 @@
+"""
+Pattern compiler for pattern mode.
+
+Besides a plain ``prefix*``, a pattern may use:
+
+* ``?``        any one character of --charset
+* ``[...]``    one character from a class, e.g. ``[bcd]``, ``[a-f0-9]``;
+               ``[^...]`` takes the class from --charset
+* ``*``        zero or more characters of --charset, anywhere and any number
+               of times
+
+Labels never start or end with a hyphen and never contain ``--``.
+
+The pattern is compiled to a DFA (subset construction over the wildcard
+positions, with the hyphen rule folded into the states). A table of accepted
+completions per state and remaining length gives the exact number of matching
+labels up front, decodes any index to its label in O(length × alphabet), and
+lets enumeration skip dead branches, so nothing outside the set is generated.
+Ambiguous patterns such as ``*a*`` still yield every label exactly once.
+
+Labels are ordered by length, then by character position in the alphabet
+(--charset order, followed by any literal characters not in it), which for a
+``prefix*`` pattern is the same order Keyspace uses.
+"""
+
+import bisect
+import itertools
+import string
+from typing import Dict, FrozenSet, Iterator, List, Tuple
+
+from .keyspace import Keyspace
+
+LABEL_CHARS = frozenset(string.ascii_lowercase + string.digits + "-")
+
+_ONE = "one"
+_STAR = "star"
+
+
+def parse_pattern(pattern: str, charset: str) -> List[Tuple[str, FrozenSet[str]]]:
+    """Split a pattern into atoms: ``(one, chars)`` or ``(star, chars)``."""
+    atoms: List[Tuple[str, FrozenSet[str]]] = []
+    any_char = frozenset(charset)
+    pattern = pattern.lower()
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "*":
+            # Adjacent stars match the same strings as one
+            if not atoms or atoms[-1] != (_STAR, any_char):
+                atoms.append((_STAR, any_char))
+        elif ch == "?":
+            atoms.append((_ONE, any_char))
+        elif ch == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                raise ValueError(f"Unclosed '[' in pattern '{pattern}'")
+            atoms.append((_ONE, _parse_class(pattern[i + 1 : end], any_char)))
+            i = end
+        elif ch in LABEL_CHARS:
+            atoms.append((_ONE, frozenset(ch)))
+        else:
+            raise ValueError(
+                f"Invalid character '{ch}' in pattern; use letters, digits, "
+                "hyphens, '?', '*' or [classes]"
+            )
+        i += 1
+    if not atoms:
+        raise ValueError("Pattern cannot be empty")
+    return atoms
+
+
+def _parse_class(body: str, any_char: FrozenSet[str]) -> FrozenSet[str]:
+    negate = body.startswith("^")
+    if negate:
+        body = body[1:]
+    chars = set()
+    i = 0
+    while i < len(body):
+        # A hyphen first or last is literal; between two characters it is a range
+        if i + 2 < len(body) and body[i + 1] == "-":
+            low, high = body[i], body[i + 2]
+            if low > high:
+                raise ValueError(f"Invalid range '{low}-{high}' in [{body}]")
+            chars.update(chr(c) for c in range(ord(low), ord(high) + 1))
+            i += 3
+        else:
+            chars.add(body[i])
+            i += 1
+    invalid = chars - LABEL_CHARS
+    if invalid:
+        raise ValueError(
+            f"Class [{body}] has characters not allowed in domain labels: "
+            + "".join(sorted(invalid))
+        )
+    chars = any_char - chars if negate else frozenset(chars)
+    if not chars:
+        raise ValueError(f"Class [{'^' if negate else ''}{body}] matches nothing")
+    return frozenset(chars)
+
+
+class PatternKeyspace:
+    """
+    Ordered, index-addressable set of labels matching a compiled pattern.
+
+    Offers the same interface as Keyspace (``total``, ``label_at``,
+    ``iter_labels``, ``iter_from``), so sharding and keyspace checkpoints work
+    unchanged.
+    """
+
+    def __init__(
+        self, pattern: str, min_len: int, max_len: int, charset: str
+    ) -> None:
+        self.pattern = pattern
+        atoms = parse_pattern(pattern, charset)
+        extra = sorted(set().union(*(chars for _, chars in atoms)) - set(charset))
+        self.alphabet = "".join(dict.fromkeys(charset)) + "".join(extra)
+        self._build_dfa(atoms)
+        self._count_completions(max_len)
+        # (first index, label length) for each length with any labels
+        self._segments: List[Tuple[int, int]] = []
+        total = 0
+        for length in range(min_len, max_len + 1):
+            count = self._counts[0][length]
+            if count:
+                self._segments.append((total, length))
+                total += count
+        self.total = total
+        self._starts = [segment[0] for segment in self._segments]
+
+    def _build_dfa(self, atoms: List[Tuple[str, FrozenSet[str]]]) -> None:
+        """
+        Subset construction; each DFA state is (NFA positions, last char hyphen?).
+
+        NFA position i means "atoms[:i] consumed"; a star atom loops on itself
+        and can be skipped. Transitions are lists indexed by alphabet position,
+        -1 for none.
+        """
+        end = len(atoms)
+
+        def closure(positions) -> FrozenSet[int]:
+            result = set()
+            for pos in positions:
+                while pos not in result:
+                    result.add(pos)
+                    if pos < end and atoms[pos][0] == _STAR:
+                        pos += 1
+                    else:
+                        break
+            return frozenset(result)
+
+        start = (closure([0]), None)  # None: nothing consumed yet
+        ids: Dict[tuple, int] = {start: 0}
+        states = [start]
+        self._trans: List[List[int]] = []
+        self._accept: List[bool] = []
+        i = 0
+        while i < len(states):
+            positions, last_hyphen = states[i]
+            row = []
+            for ch in self.alphabet:
+                hyphen = ch == "-"
+                # No leading hyphen and no "--"
+                if hyphen and last_hyphen is not False:
+                    row.append(-1)
+                    continue
+                moved = []
+                for pos in positions:
+                    if pos < end and ch in atoms[pos][1]:
+                        moved.append(pos if atoms[pos][0] == _STAR else pos + 1)
+                if not moved:
+                    row.append(-1)
+                    continue
+                key = (closure(moved), hyphen)
+                if key not in ids:
+                    ids[key] = len(states)
+                    states.append(key)
+                row.append(ids[key])
+            self._trans.append(row)
+            # No trailing hyphen, and at least one character
+            self._accept.append(end in positions and last_hyphen is False)
+            i += 1
+
+    def _count_completions(self, max_len: int) -> None:
+        """``_counts[state][n]``: accepted strings of length n from ``state``."""
+        n_states = len(self._trans)
+        counts = [[0] * (max_len + 1) for _ in range(n_states)]
+        for state in range(n_states):
+            counts[state][0] = int(self._accept[state])
+        for n in range(1, max_len + 1):
+            for state, row in enumerate(self._trans):
+                counts[state][n] = sum(counts[t][n - 1] for t in row if t >= 0)
+        self._counts = counts
+
+    def __len__(self) -> int:
+        return self.total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Return (label length, offset among labels of that length)."""
+        if not 0 <= index < self.total:
+            raise IndexError(f"Keyspace index {index} out of range (0..{self.total})")
+        pos = bisect.bisect_right(self._starts, index) - 1
+        return self._segments[pos][1], index - self._starts[pos]
+
+    def _path(self, offset: int, length: int) -> List[int]:
+        """Alphabet positions of the ``offset``-th label of ``length``."""
+        path = []
+        state = 0
+        for remaining in range(length - 1, -1, -1):
+            for k, nxt in enumerate(self._trans[state]):
+                if nxt < 0:
+                    continue
+                count = self._counts[nxt][remaining]
+                if offset < count:
+                    path.append(k)
+                    state = nxt
+                    break
+                offset -= count
+        return path
+
+    def label_at(self, index: int) -> str:
+        """Decode the label at ``index`` without enumerating its predecessors."""
+        length, offset = self._locate(index)
+        return "".join(self.alphabet[k] for k in self._path(offset, length))
+
+    def iter_labels(self, start: int = 0) -> Iterator[str]:
+        """Yield labels in order beginning at ``start``."""
+        if start >= self.total:
+            return
+        length, offset = self._locate(start)
+        path = self._path(offset, length)
+        for _, length in self._segments[bisect.bisect_right(self._starts, start) - 1 :]:
+            yield from self._walk(0, length, "", path)
+            path = None
+
+    def iter_from(self, start: int = 0, step: int = 1) -> Iterator[Tuple[int, str]]:
+        """Yield ``(index, label)`` pairs beginning at ``start``, every ``step``-th one."""
+        labels = self.iter_labels(start)
+        if step > 1:
+            labels = itertools.islice(labels, 0, None, step)
+        return zip(itertools.count(start, step), labels)
+
+    def _walk(
+        self, state: int, remaining: int, head: str, path: List[int] | None
+    ) -> Iterator[str]:
+        """Accepted labels of ``remaining`` more characters, from ``path`` onwards."""
+        first = path[0] if path else 0
+        row = self._trans[state]
+        alphabet = self.alphabet
+        if remaining == 1:
+            for k in range(first, len(row)):
+                nxt = row[k]
+                if nxt >= 0 and self._accept[nxt]:
+                    yield head + alphabet[k]
+            return
+        counts = self._counts
+        for k in range(first, len(row)):
+            nxt = row[k]
+            if nxt < 0 or not counts[nxt][remaining - 1]:
+                continue
+            rest = path[1:] if path and k == first else None
+            yield from self._walk(nxt, remaining - 1, head + alphabet[k], rest)
+
+
+def compile_pattern(
+    pattern: str, min_len: int, max_len: int, charset: str
+) -> Keyspace | PatternKeyspace:
+    """
+    Keyspace for ``pattern``: the plain Keyspace for a hyphen-free ``prefix`` or
+    ``prefix*`` (its fast path, and its checkpoints stay valid), otherwise a
+    PatternKeyspace.
+    """
+    pattern = pattern.lower()
+    if "*" not in pattern.rstrip("*") and not any(c in pattern for c in "?["):
+        prefix = pattern.rstrip("*")
+        wildcard = pattern.endswith("*")
+        if prefix and "-" not in prefix and "-" not in charset:
+            if any(ch not in LABEL_CHARS for ch in prefix):
+                raise ValueError(
+                    "Pattern prefix may only contain letters, digits, or hyphens"
+                )
+            return Keyspace(prefix, wildcard, min_len, max_len, charset)
+    return PatternKeyspace(pattern, min_len, max_len, charset)
+
@@ -0,0 +1,222 @@
+"""
+Request rate limiting.
+
+RateLimiter is a token bucket with a fixed rate and burst. AdaptiveRateLimiter adjusts
+its cap with AIMD (additive increase, multiplicative decrease) from upstream
+feedback, and HostRateLimiter keeps one limiter per upstream host so each RDAP
+registry is paced independently.
+"""
+
+import asyncio
+import email.utils
+import time
+from typing import Awaitable, Callable, Dict
+
+# Statuses that mean "slow down" rather than "this lookup failed"
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter: a sustained ``rate`` with bursts of up to ``burst``.
+
+    Implemented as GCRA (generic cell rate algorithm): each caller reserves the
+    next slot on a theoretical arrival time and then sleeps on its own until that
+    slot, without holding a lock. Reservation never awaits, so it is atomic on the
+    event loop and concurrent waiters sleep in parallel rather than in turn.
+    """
+
+    def __init__(
+        self,
+        rate: float | None,
+        burst: int = 1,
+        clock: Callable[[], float] = None,
+        sleep: Callable[[float], Awaitable[None]] = None,
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("Rate must be positive or omitted")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1")
+        self._interval = 1.0 / rate if rate else None
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep or asyncio.sleep
+        self._tat = float("-inf")  # theoretical arrival time of the next permit
+
+    @property
+    def rate(self) -> float | None:
+        return 1.0 / self._interval if self._interval else None
+
+    def _now(self) -> float:
+        if self._clock is not None:
+            return self._clock()
+        return asyncio.get_running_loop().time()
+
+    def reserve(self) -> float:
+        """Take the next permit and return how long the caller must wait for it."""
+        if self._interval is None:
+            return 0.0
+        now = self._now()
+        tat = max(self._tat, now)
+        self._tat = tat + self._interval
+        return max(0.0, tat - (self.burst - 1) * self._interval - now)
+
+    def is_saturated(self) -> bool:
+        """True when the next permit is not immediately available."""
+        if self._interval is None:
+            return False
+        return self._tat - (self.burst - 1) * self._interval > self._now()
+
+    async def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await self._sleep(delay)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    AIMD rate limiter driven by upstream responses.
+
+    Every healthy response adds ``increase / rate`` to the rate, so the cap grows
+    by about ``increase`` requests per second for each second of clean traffic.
+    A throttling response multiplies it by ``decrease`` (at most once per
+    ``cooldown`` seconds, since a burst of in-flight requests is usually rejected
+    together) and pushes the next permit past the server's Retry-After, if given.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float,
+        min_rate: float = 1.0,
+        max_rate: float | None = None,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+        burst: int = 1,
+        clock: Callable[[], float] = None,
+        sleep: Callable[[float], Awaitable[None]] = None,
+    ) -> None:
+        super().__init__(initial_rate, burst, clock, sleep)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._last_decrease = float("-inf")
+        self._binding = False
+        self.throttled = 0
+
+    def _set_rate(self, rate: float) -> None:
+        rate = max(self.min_rate, rate)
+        if self.max_rate:
+            rate = min(self.max_rate, rate)
+        self._interval = 1.0 / rate
+
+    def on_success(self) -> None:
+        # Only grow while the cap is what limits throughput; otherwise the rate
+        # would drift upward without ever being exercised
+        if self._binding:
+            rate = self.rate
+            self._set_rate(rate + self.increase / rate)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        self.throttled += 1
+        now = self._now()
+        if now - self._last_decrease >= self.cooldown:
+            self._last_decrease = now
+            self._set_rate(self.rate * self.decrease)
+        if retry_after:
+            # No permit is handed out before the server asked us to come back
+            self._tat = max(self._tat, now + retry_after + (self.burst - 1) * self._interval)
+
+    async def wait(self) -> None:
+        self._binding = self.is_saturated()
+        await super().wait()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class HostRateLimiter:
+    """One rate limiter per upstream host, created on first use."""
+
+    def __init__(
+        self,
+        rate: float | None,
+        adaptive: bool = False,
+        max_rate: float | None = None,
+        min_rate: float = 1.0,
+        burst: int = 1,
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("Rate must be positive or omitted")
+        self.rate = rate
+        self.burst = burst
+        self.adaptive = adaptive
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._responses: Dict[str, int] = {}
+        self._first_seen: Dict[str, float] = {}
+
+    def for_host(self, host: str) -> RateLimiter:
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            if self.adaptive:
+                initial = self.rate or self.min_rate
+                limiter = AdaptiveRateLimiter(
+                    initial,
+                    self.min_rate,
+                    self.max_rate,
+                    increase=max(1.0, initial * 0.1),
+                    burst=self.burst,
+                )
+            else:
+                limiter = RateLimiter(self.rate, self.burst)
+            self._limiters[host] = limiter
+        return limiter
+
+    async def wait(self, host: str) -> None:
+        await self.for_host(host).wait()
+
+    def feedback(self, host: str, status: int, retry_after: str | None = None) -> None:
+        """Report an upstream HTTP status so adaptive limiters can adjust."""
+        self._responses[host] = self._responses.get(host, 0) + 1
+        self._first_seen.setdefault(host, time.monotonic())
+        limiter = self.for_host(host)
+        if not isinstance(limiter, AdaptiveRateLimiter):
+            return
+        if status in THROTTLE_STATUSES:
+            limiter.on_throttle(parse_retry_after(retry_after))
+        elif status < 500:
+            limiter.on_success()
+
+    def effective_rates(self) -> Dict[str, float | None]:
+        """Current rate cap per host."""
+        return {host: limiter.rate for host, limiter in self._limiters.items()}
+
+    def report(self) -> list[str]:
+        """One summary line per host: settled cap, achieved rate and throttling."""
+        lines = []
+        now = time.monotonic()
+        for host, limiter in self._limiters.items():
+            elapsed = now - self._first_seen.get(host, now)
+            responses = self._responses.get(host, 0)
+            achieved = responses / elapsed if elapsed > 0 else 0.0
+            cap = f"{limiter.rate:.1f}/s" if limiter.rate else "unlimited"
+            line = f"{host}: rate {cap}, achieved {achieved:.1f}/s"
+            if isinstance(limiter, AdaptiveRateLimiter):
+                line += f", throttled {limiter.throttled}x"
+            lines.append(line)
+        return lines
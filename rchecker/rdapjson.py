@@ -0,0 +1,107 @@
+"""
+Incremental extraction of selected top-level members from an RDAP response.
+
+An RDAP domain object is a few KB, most of it entities, notices and links, while
+a lookup needs at most the ``events`` (expiry date) and ``status`` members.
+TopLevelFields consumes the body chunk by chunk and walks only the top-level
+object: each member's key and value are decoded with the C JSON decoder, wanted
+values are kept and the rest are skipped, and reading stops once every wanted
+member has been seen, so the remainder of the body is never parsed.
+
+A value split across chunks is decoded again once more data arrives; RDAP bodies
+are small, so this rarely costs more than one retry.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable
+
+# Top-level members a lookup reads when it needs details
+RDAP_FIELDS = ("events", "status")
+
+_DECODER = json.JSONDecoder()
+_BLANK = re.compile(r"[ \t\n\r]*")
+# The next non-blank character; the class keeps a blank at the end of a chunk
+# from being taken as the token
+_TOKEN = re.compile(r"[ \t\n\r]*([^ \t\n\r])")
+# A member's key and colon, ending where its value starts
+_KEY = re.compile(r'[ \t\n\r]*"((?:[^"\\]|\\.)*)"[ \t\n\r]*:[ \t\n\r]*')
+
+_START = 0
+_KEY_NEXT = 1
+_VALUE = 2
+
+
+class TopLevelFields:
+    """Streaming reader for the ``wanted`` members of a top-level JSON object."""
+
+    def __init__(self, wanted: Iterable[str] = RDAP_FIELDS) -> None:
+        self.wanted = frozenset(wanted)
+        self.values: Dict[str, Any] = {}
+        self.done = False
+        self._partial = b""  # bytes of a character split across chunks
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume the next chunk; True once nothing more needs to be read."""
+        if self.done:
+            return True
+        # Drop what has been consumed so the buffer only holds the open member
+        data = self._partial + chunk
+        text, used = codecs.utf_8_decode(data, "replace", False)
+        self._partial = data[used:]
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+        self._scan()
+        return self.done
+
+    def _scan(self) -> None:
+        buf = self._buf
+        pos = self._pos
+        values = self.values
+        while True:
+            if self._state == _START:
+                match = _TOKEN.match(buf, pos)
+                if not match:
+                    break
+                if match.group(1) != "{":
+                    self.done = True  # not an object: nothing to extract
+                    break
+                pos = match.end()
+                self._state = _KEY_NEXT
+            elif self._state == _KEY_NEXT:
+                match = _KEY.match(buf, pos)
+                if not match:
+                    # An empty object, or a key that is still incomplete
+                    token = _TOKEN.match(buf, pos)
+                    self.done = token is not None and token.group(1) == "}"
+                    break
+                self._key = match.group(1)
+                pos = match.end()
+                self._state = _VALUE
+            else:
+                # The value may start in a later chunk than its key
+                pos = _BLANK.match(buf, pos).end()
+                try:
+                    value, end = _DECODER.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    break  # value not complete yet
+                # The separator must be there, as a number may continue
+                match = _TOKEN.match(buf, end)
+                if not match:
+                    break
+                if self._key in self.wanted:
+                    values[self._key] = value
+                    if len(values) == len(self.wanted):
+                        self.done = True
+                        break
+                pos = match.end()
+                if match.group(1) != ",":
+                    self.done = True  # end of the object, or malformed
+                    break
+                self._state = _KEY_NEXT
+        self._pos = pos
@@ -0,0 +1,121 @@
+"""
+Lookup outcome shared by the checker, the result cache and output writers.
+"""
+
+import time
+from datetime import datetime
+from typing import List
+
+AVAILABLE = "available"
+REGISTERED = "registered"
+ERROR = "error"
+
+# Columns of a full result record, in output order
+RESULT_FIELDS = (
+    "fqdn",
+    "outcome",
+    "status",
+    "latency_ms",
+    "attempts",
+    "source",
+    "expires_at",
+    "checked_at",
+    "error",
+    "rdap_status",
+)
+
+
+class LookupResult:
+    """Outcome of one RDAP lookup."""
+
+    __slots__ = (
+        "fqdn",
+        "available",
+        "status",
+        "expires_at",
+        "checked_at",
+        "error",
+        "latency",
+        "attempts",
+        "source",
+        "retry_after",
+        "rdap_status",
+        "limiter_wait",
+    )
+
+    def __init__(
+        self,
+        fqdn: str,
+        available: bool | None,
+        status: int | None = None,
+        expires_at: float | None = None,
+        error: str | None = None,
+        attempts: int = 0,
+        source: str = "rdap",
+    ) -> None:
+        self.fqdn = fqdn
+        self.available = available  # True, False, or None when unknown
+        self.status = status  # last HTTP status, if a response was received
+        self.expires_at = expires_at  # registration expiry (epoch seconds)
+        self.checked_at = time.time()
+        self.error = error
+        self.latency = None  # seconds spent on requests, summed over retries
+        self.attempts = attempts  # requests sent; 0 when answered without RDAP
+        self.source = source  # "rdap", "dns" or "cache"
+        self.retry_after = None  # server's Retry-After in seconds, if throttled
+        self.rdap_status = None  # RDAP status flags, e.g. ["pending delete"]
+        self.limiter_wait = 0.0  # seconds queued on the rate limiter, over retries
+
+    @property
+    def outcome(self) -> str:
+        if self.available is True:
+            return AVAILABLE
+        if self.available is False:
+            return REGISTERED
+        return ERROR
+
+    def as_record(self) -> dict:
+        """Flat dict of RESULT_FIELDS for the result writers."""
+        return {
+            "fqdn": self.fqdn,
+            "outcome": self.outcome,
+            "status": self.status,
+            "latency_ms": (
+                round(self.latency * 1000, 1) if self.latency is not None else None
+            ),
+            "attempts": self.attempts,
+            "source": self.source,
+            "expires_at": self.expires_at,
+            "checked_at": round(self.checked_at, 3),
+            "error": self.error,
+            "rdap_status": ",".join(self.rdap_status) if self.rdap_status else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"LookupResult({self.fqdn!r}, {self.outcome}, status={self.status})"
+
+
+def parse_rdap_expiration(data: dict) -> float | None:
+    """Expiration date from an RDAP domain object's events, as epoch seconds."""
+    for event in data.get("events") or []:
+        if event.get("eventAction") == "expiration":
+            return parse_rdap_date(event.get("eventDate"))
+    return None
+
+
+def parse_rdap_status(data: dict) -> List[str] | None:
+    """Status flags of an RDAP domain object, e.g. ["active"]."""
+    status = data.get("status")
+    if not isinstance(status, list):
+        return None
+    return [flag for flag in status if isinstance(flag, str)]
+
+
+def parse_rdap_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        # RDAP dates are RFC 3339; fromisoformat() before 3.11 rejects "Z"
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
@@ -0,0 +1,208 @@
+"""
+Retry policy and the delayed retry queue.
+
+RetryPolicy decides which failed lookups are worth another attempt (by failure
+class: timeouts, network errors, 5xx responses, throttling) and how long to back
+off: exponential with full jitter, never sooner than a server's Retry-After.
+
+RetryQueue keeps workers busy while failures back off. A worker hands a failed
+lookup to the queue and moves straight on to fresh work; a pump task puts the
+domain back on its work queue once its delay has passed. The queue also tracks
+how many retried domains are still unresolved, so the pipeline knows when every
+lookup, including the retries, has finished.
+"""
+
+import asyncio
+import heapq
+import random
+from typing import Awaitable, Callable, Dict, Iterable, List, Set, Tuple
+
+from .ratelimit import THROTTLE_STATUSES
+from .result import LookupResult
+
+RETRY_TIMEOUT = "timeout"
+RETRY_NETWORK = "network"
+RETRY_SERVER = "5xx"
+RETRY_THROTTLE = "429"
+RETRY_CLASSES = (RETRY_TIMEOUT, RETRY_NETWORK, RETRY_SERVER, RETRY_THROTTLE)
+
+
+def failure_class(result: LookupResult) -> str | None:
+    """Retry class of a failed lookup, or None if it succeeded or is final (e.g. 4xx)."""
+    if result.available is not None:
+        return None
+    if result.status is not None:
+        if result.status in THROTTLE_STATUSES:
+            return RETRY_THROTTLE
+        if result.status >= 500:
+            return RETRY_SERVER
+        return None
+    if result.error == "timeout":
+        return RETRY_TIMEOUT
+    return RETRY_NETWORK
+
+
+def parse_retry_classes(value: str) -> frozenset:
+    classes = frozenset(c.strip() for c in value.split(",") if c.strip())
+    unknown = classes - set(RETRY_CLASSES)
+    if unknown:
+        raise ValueError(
+            f"Unknown retry class(es) {', '.join(sorted(unknown))}; "
+            f"choose from {', '.join(RETRY_CLASSES)}"
+        )
+    return classes
+
+
+class RetryPolicy:
+    """Which failures to retry, how often, and the backoff between attempts."""
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retry_on: Iterable[str] = RETRY_CLASSES,
+        rng: random.Random = None,
+    ) -> None:
+        if max_retries < 0:
+            raise ValueError("max_retries cannot be negative")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError("Retry delays must satisfy 0 <= base <= max")
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = frozenset(retry_on)
+        self._rng = rng or random.Random()
+
+    def should_retry(self, result: LookupResult, retries_done: int) -> bool:
+        return (
+            retries_done < self.max_retries
+            and failure_class(result) in self.retry_on
+        )
+
+    def delay(self, retries_done: int, retry_after: float | None = None) -> float:
+        """Full-jitter exponential backoff, at least the server's Retry-After."""
+        cap = min(self.max_delay, self.base_delay * 2**retries_done)
+        delay = self._rng.uniform(0, cap)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class RetryQueue:
+    """
+    Delay heap for failed lookups plus completion tracking.
+
+    ``schedule`` takes a failed lookup and returns True if it will be retried;
+    the caller then drops it and continues. ``finish`` is called when a domain's
+    outcome is final and folds the attempts, latency and rate limit wait of the
+    dropped attempts into its result. ``join`` waits until the given work queues
+    are drained and no retried domain is still pending.
+    """
+
+    def __init__(
+        self,
+        policy: RetryPolicy,
+        dispatch: Callable[[str], Awaitable[None]],
+        final_pass: bool = False,
+    ) -> None:
+        self.policy = policy
+        self._dispatch = dispatch
+        self._heap: list = []
+        self._seq = 0
+        self._retries: Dict[str, int] = {}
+        # (attempts, latency, limiter wait) of attempts dropped for a retry
+        self._carried: Dict[str, Tuple[int, float, float]] = {}
+        self._last_chance: Set[str] = set()  # in the final pass: no more retries
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.scheduled = 0
+        # Domains that exhausted their retries, held back for a final pass
+        self.deferred: List[str] | None = [] if final_pass else None
+
+    @property
+    def pending(self) -> int:
+        """Domains with a retry in progress (waiting or re-queued)."""
+        return len(self._retries)
+
+    def schedule(self, result: LookupResult) -> bool:
+        fqdn = result.fqdn
+        retries_done = self._retries.get(fqdn, 0)
+        if fqdn in self._last_chance or not self.policy.should_retry(
+            result, retries_done
+        ):
+            return False
+        self._retries[fqdn] = retries_done + 1
+        self._carry(result)
+        self._idle.clear()
+        self.scheduled += 1
+        due = asyncio.get_running_loop().time() + self.policy.delay(
+            retries_done, result.retry_after
+        )
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, fqdn))
+        self._wakeup.set()
+        return True
+
+    def defer(self, result: LookupResult) -> bool:
+        """Hold a final failure back for the errors-only pass, if one is planned."""
+        if self.deferred is None or result.available is not None:
+            return False
+        self.finish(result)
+        self.deferred.append(result.fqdn)
+        self._carry(result)
+        return True
+
+    def finish(self, result: LookupResult) -> None:
+        """Record that ``result`` is final; sets its totals over all attempts."""
+        attempts, latency, waited = self._carried.pop(result.fqdn, (0, 0.0, 0.0))
+        result.attempts += attempts
+        result.latency += latency
+        result.limiter_wait += waited
+        self._last_chance.discard(result.fqdn)
+        if self._retries.pop(result.fqdn, None) is not None and not self._retries:
+            self._idle.set()
+
+    def _carry(self, result: LookupResult) -> None:
+        """Add a dropped attempt to the totals the domain's final result gets."""
+        attempts, latency, waited = self._carried.get(result.fqdn, (0, 0.0, 0.0))
+        self._carried[result.fqdn] = (
+            attempts + result.attempts,
+            latency + result.latency,
+            waited + result.limiter_wait,
+        )
+
+    async def run(self) -> None:
+        """Pump task: re-dispatch each domain when its backoff expires."""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, fqdn = heapq.heappop(self._heap)
+            await self._dispatch(fqdn)
+
+    async def join(self, queues: Iterable[asyncio.Queue]) -> None:
+        """Wait until the queues are drained and every retry has resolved."""
+        queues = list(queues)
+        while True:
+            for queue in queues:
+                await queue.join()
+            if not self._retries:
+                return
+            await self._idle.wait()
+
+    def start_final_pass(self) -> List[str]:
+        """End deferral and return the domains to try exactly once more."""
+        deferred, self.deferred = self.deferred or [], None
+        self._last_chance.update(deferred)
+        return deferred
@@ -0,0 +1,197 @@
+"""
+Sharded scanning across processes and machines.
+
+``--shard i/N`` keeps every N-th candidate starting at position i of the
+deterministic candidate stream (keyspace index in pattern mode, position among
+length-matching words in wordlist mode), so N independent runs, on one host or
+many, cover the space exactly once with no coordination. ``--workers N`` runs the
+N shards as local processes and merges their outputs (``-o``, ``--results`` and
+``--matrix``) when they all finish; checkpoints stay per shard, since each
+worker resumes its own. SIGTERM is passed on to the workers so each drains and
+saves its checkpoint.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import shutil
+import sys
+from typing import Callable, Tuple
+
+from .output import result_format_for
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse ``"i/N"`` into ``(i, N)`` with ``0 <= i < N``."""
+    try:
+        index_text, count_text = spec.split("/")
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise ValueError(f"Invalid --shard '{spec}', expected i/N (e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid --shard '{spec}', need 0 <= i < N")
+    return index, count
+
+
+def shard_size(total: int, index: int, count: int) -> int:
+    """Number of positions in ``range(total)`` that belong to shard ``index``."""
+    return len(range(index, total, count))
+
+
+def shard_path(path: str, index: int, count: int) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{index}of{count}{ext}"
+
+
+def shard_args(args: argparse.Namespace, index: int, count: int) -> argparse.Namespace:
+    """Arguments for one local worker process: its shard and a share of the limits."""
+    child = argparse.Namespace(**vars(args))
+    child.shard = f"{index}/{count}"
+    child.workers = 1
+    child.rate = args.rate / count if args.rate > 0 else args.rate
+    child.max_rate = args.max_rate / count if args.max_rate > 0 else args.max_rate
+    child.concurrency = max(1, -(-args.concurrency // count))
+    child.dns_concurrency = max(1, -(-args.dns_concurrency // count))
+    child.no_progress = True
+    child.output = shard_path(args.output, index, count)
+    if args.results:
+        child.results = shard_path(args.results, index, count)
+    if args.matrix:
+        child.matrix = shard_path(args.matrix, index, count)
+    if args.metrics_port:
+        # One endpoint per worker process
+        child.metrics_port = args.metrics_port + index
+    child.progress_file = (
+        shard_path(args.progress_file, index, count) if args.progress_file else None
+    )
+    return child
+
+
+def _merge(paths: list, output: str, write: Callable[[list, str], None]) -> None:
+    """Have ``write`` combine the existing ``paths`` into ``output``, then remove them."""
+    # Shard files are only removed once the merged file is in place, so an
+    # interrupted merge loses nothing
+    paths = [path for path in paths if os.path.exists(path)]
+    tmp_path = f"{output}.tmp"
+    write(paths, tmp_path)
+    if not os.path.exists(tmp_path):
+        return  # nothing to merge
+    with open(tmp_path, "r+b") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output)
+    for path in paths:
+        os.remove(path)
+
+
+def merge_outputs(paths: list, output: str, header: bool = False) -> int:
+    """
+    Concatenate line-oriented shard files into ``output`` and remove them.
+
+    With ``header``, every file starts with the same header line (CSV), which
+    is kept once. Returns the number of lines merged, headers excluded.
+    """
+    merged = 0
+
+    def write(paths: list, target: str) -> None:
+        nonlocal merged
+        with open(target, "w", encoding="utf-8", newline="") as out:
+            for number, path in enumerate(paths):
+                with open(path, "r", encoding="utf-8", newline="") as f:
+                    if header:
+                        first = f.readline()
+                        if number == 0:
+                            out.write(first)
+                    for line in f:
+                        out.write(line)
+                        merged += 1
+
+    _merge(paths, output, write)
+    return merged
+
+
+def _concatenate(paths: list, target: str) -> None:
+    with open(target, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out)
+
+
+def _merge_parquet(paths: list, target: str) -> None:
+    import pyarrow.parquet as pq  # the shards could only write Parquet with it
+
+    writer = None
+    for path in paths:
+        source = pq.ParquetFile(path)
+        if writer is None:
+            writer = pq.ParquetWriter(target, source.schema_arrow, compression="zstd")
+        for group in range(source.num_row_groups):
+            writer.write_table(source.read_row_group(group))
+    if writer is not None:
+        writer.close()
+
+
+def merge_results(paths: list, output: str, fmt: str) -> None:
+    """Merge shard result files written in ``fmt`` into ``output``."""
+    if fmt in ("text", "jsonl", "csv"):
+        merge_outputs(paths, output, header=fmt == "csv")
+    elif fmt == "columnar":
+        # Concatenated gzip members read back as one stream
+        _merge(paths, output, _concatenate)
+    else:
+        _merge(paths, output, _merge_parquet)
+
+
+def supervise(args: argparse.Namespace, target: Callable[[argparse.Namespace], None]) -> int:
+    """Run ``args.workers`` shards as local processes; returns the number that failed."""
+    count = args.workers
+    children = [shard_args(args, index, count) for index in range(count)]
+    # spawn gives each worker a clean interpreter with its own event loop and session
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=target, args=(child,), name=f"rchecker-shard-{child.shard}")
+        for child in children
+    ]
+    print(f"Starting {count} worker processes", file=sys.stderr)
+    for process in processes:
+        process.start()
+    # Ctrl-C reaches the whole process group, but SIGTERM only this process
+    previous = signal.signal(
+        signal.SIGTERM, lambda signum, frame: [p.terminate() for p in processes]
+    )
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # The workers got the same SIGINT and are draining; wait for them
+        for process in processes:
+            process.join()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    failed = [p.name for p in processes if p.exitcode != 0]
+    if failed:
+        # Keep shard outputs alongside their checkpoints for a --resume
+        print(
+            f"{len(failed)} of {count} shards failed ({', '.join(failed)}); "
+            "shard outputs and checkpoints were kept for --resume",
+            file=sys.stderr,
+        )
+        return len(failed)
+
+    merged = merge_outputs([child.output for child in children], args.output)
+    print(
+        f"Merged {merged} available domains from {count} shards into {args.output}",
+        file=sys.stderr,
+    )
+    if args.results:
+        fmt = args.results_format or result_format_for(args.results)
+        merge_results([child.results for child in children], args.results, fmt)
+        print(f"Merged shard results into {args.results}", file=sys.stderr)
+    if args.matrix:
+        rows = merge_outputs([child.matrix for child in children], args.matrix, True)
+        print(
+            f"Merged {rows} matrix rows from {count} shards into {args.matrix}",
+            file=sys.stderr,
+        )
+    return 0
@@ -0,0 +1,86 @@
+"""
+Graceful shutdown on SIGINT/SIGTERM.
+
+The first signal asks the scan to stop: the producer stops generating, queued
+domains are dropped (they are not in the checkpoint, so a resumed scan queries
+them), and lookups already in flight get ``--shutdown-timeout`` seconds to
+finish and be recorded. A second signal ends that wait at once. Either way
+``run`` still closes the checkpoint and outputs, then raises ScanInterrupted.
+
+Where the event loop cannot install signal handlers (Windows), Ctrl-C keeps
+asyncio's default behaviour of cancelling the scan, which closes the checkpoint
+and outputs just the same but skips the drain.
+"""
+
+import asyncio
+import signal
+import sys
+from typing import Iterable
+
+SHUTDOWN_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+class ScanInterrupted(Exception):
+    """A scan stopped early on a signal; its checkpoint has been saved."""
+
+    def __init__(self, signum: int) -> None:
+        super().__init__(f"Interrupted by {signal.Signals(signum).name}")
+        self.signum = signum
+
+    @property
+    def exit_code(self) -> int:
+        return 128 + self.signum
+
+
+class GracefulShutdown:
+    """First signal requests a drain; a second one cuts the drain short."""
+
+    def __init__(self, timeout: float = 10.0) -> None:
+        if timeout < 0:
+            raise ValueError("--shutdown-timeout cannot be negative")
+        self.timeout = timeout
+        self.signum: int | None = None
+        self.requested = asyncio.Event()
+        self._forced = asyncio.Event()
+        self._installed = []
+
+    def install(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in SHUTDOWN_SIGNALS:
+            try:
+                loop.add_signal_handler(signum, self._handle, signum)
+            except (NotImplementedError, RuntimeError):
+                continue  # no loop signal support here; keep the default
+            self._installed.append(signum)
+
+    def remove(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in self._installed:
+            loop.remove_signal_handler(signum)
+        self._installed.clear()
+
+    def _handle(self, signum: int) -> None:
+        if self.signum is None:
+            self.signum = signum
+            self.requested.set()
+            print(
+                f"\n{signal.Signals(signum).name} received: finishing lookups in "
+                f"flight (up to {self.timeout:g}s); send it again to stop now",
+                file=sys.stderr,
+            )
+        elif not self._forced.is_set():
+            self._forced.set()
+            print("Stopping without waiting for lookups in flight", file=sys.stderr)
+
+    async def drain(self, tasks: Iterable[asyncio.Task]) -> bool:
+        """Wait for ``tasks`` up to the deadline; True if they all finished."""
+        finished = asyncio.gather(*tasks, return_exceptions=True)
+        forced = asyncio.ensure_future(self._forced.wait())
+        done, _ = await asyncio.wait(
+            {finished, forced},
+            timeout=self.timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        forced.cancel()
+        # Stragglers are left running; the caller cancels them
+        return finished in done
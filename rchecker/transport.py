@@ -0,0 +1,240 @@
+"""
+HTTP transports for RDAP lookups.
+
+A transport sends one request and returns a TransportResponse; it raises
+asyncio.TimeoutError when the request runs out of time and TransportError (or
+ssl.SSLError) when it fails below HTTP, so lookup code does not depend on the
+client library.
+
+Bodies are never buffered whole. ``fetch`` without fields only needs the status,
+so it sends HEAD (RFC 7480 allows RDAP clients to test existence that way) and
+falls back to GET for hosts that answer 405 or 501. When a GET body is not
+needed it is drained in chunks and discarded, which keeps an HTTP/1.1
+connection reusable; a body too long to be worth draining closes the connection
+instead. With fields, the body is streamed through TopLevelFields and reading
+stops once those members have been seen.
+
+* AiohttpTransport (default) uses aiohttp's HTTP/1.1 keep-alive pool. Every
+  connection carries one request at a time, so N lookups in flight need N
+  sockets and N TLS handshakes per registry.
+* Http2Transport needs the optional httpx[http2]. Lookups become concurrent
+  streams on a shared connection; a per-host semaphore caps the streams in
+  flight, and a further connection is only opened once the server's
+  per-connection stream limit is reached. ``https://`` URLs negotiate HTTP/2
+  through ALPN and fall back to HTTP/1.1; ``http://`` URLs speak HTTP/2 with
+  prior knowledge (h2c), as local test servers do.
+
+``warm_up`` opens connections before the scan, so the first wave of lookups
+does not pile up behind handshakes.
+"""
+
+import asyncio
+import ssl
+from typing import Collection, Dict, Iterable, Set
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .rdapjson import TopLevelFields
+
+USER_AGENT = "domain-checker/0.1"
+TRANSPORTS = ("aiohttp", "http2")
+
+# Statuses meaning "HEAD is not supported here"
+HEAD_UNSUPPORTED = frozenset({405, 501})
+# Longer leftover bodies close the connection instead of being read
+DRAIN_LIMIT = 64 * 1024
+
+
+class TransportError(Exception):
+    """A request failed before an HTTP response arrived."""
+
+
+class TransportResponse:
+    """Status, headers and the requested top-level members of one response."""
+
+    __slots__ = ("status", "headers", "fields")
+
+    def __init__(self, status: int, headers, fields: dict | None = None) -> None:
+        self.status = status
+        self.headers = headers
+        self.fields = fields
+
+
+class Transport:
+    """Shared lookup logic; subclasses implement ``request``."""
+
+    name = ""
+
+    def __init__(self, use_head: bool = True) -> None:
+        self.use_head = use_head
+        self._no_head: Set[str] = set()  # hosts that rejected HEAD
+
+    async def fetch(
+        self, url: str, timeout: float, fields: Collection[str] = ()
+    ) -> TransportResponse:
+        """Status and headers of ``url``, plus ``fields`` of a JSON body."""
+        if not fields and self.use_head:
+            host = urlsplit(url).netloc
+            if host not in self._no_head:
+                resp = await self.request("HEAD", url, timeout)
+                if resp.status not in HEAD_UNSUPPORTED:
+                    return resp
+                self._no_head.add(host)
+        return await self.request("GET", url, timeout, fields)
+
+    async def request(
+        self, method: str, url: str, timeout: float, fields: Collection[str] = ()
+    ) -> TransportResponse:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+async def _read_fields(chunks, fields: Collection[str]) -> dict:
+    reader = TopLevelFields(fields)
+    async for chunk in chunks:
+        if reader.feed(chunk):
+            break
+    return reader.values
+
+
+class AiohttpTransport(Transport):
+    """HTTP/1.1 over an aiohttp ClientSession."""
+
+    name = "aiohttp"
+
+    def __init__(self, session: aiohttp.ClientSession, use_head: bool = True) -> None:
+        super().__init__(use_head)
+        self.session = session
+
+    async def request(
+        self, method: str, url: str, timeout: float, fields: Collection[str] = ()
+    ) -> TransportResponse:
+        try:
+            async with self.session.request(
+                method, url, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as resp:
+                values = None
+                if fields and resp.status == 200:
+                    values = await _read_fields(resp.content.iter_any(), fields)
+                await self._drain(resp)
+                return TransportResponse(resp.status, resp.headers, values)
+        except ssl.SSLError:
+            raise
+        except aiohttp.ClientError as exc:
+            raise TransportError(str(exc)) from exc
+
+    @staticmethod
+    async def _drain(resp: aiohttp.ClientResponse) -> None:
+        """Discard the rest of the body so the connection goes back to the pool."""
+        if resp.method == "HEAD":
+            return  # no body, whatever Content-Length says
+        if resp.content_length is not None and resp.content_length > DRAIN_LIMIT:
+            resp.close()
+            return
+        drained = 0
+        while chunk := await resp.content.readany():
+            drained += len(chunk)
+            if drained > DRAIN_LIMIT:
+                resp.close()
+                return
+
+
+class Http2Transport(Transport):
+    """HTTP/2 over httpx, with at most ``max_streams`` requests in flight per host."""
+
+    name = "http2"
+
+    def __init__(self, max_streams: int = 100, use_head: bool = True) -> None:
+        super().__init__(use_head)
+        if max_streams < 1:
+            raise ValueError("max_streams must be at least 1")
+        try:
+            import h2  # noqa: F401  httpx only imports it on first use
+            import httpx
+        except ImportError:
+            raise ValueError(
+                "The http2 transport needs httpx with HTTP/2 support "
+                "(pip install 'rchecker[http2]')"
+            )
+        self._httpx = httpx
+        self.max_streams = max_streams
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+        self._streams: Dict[str, asyncio.Semaphore] = {}
+
+    def _client(self, scheme: str):
+        client = self._clients.get(scheme)
+        if client is None:
+            httpx = self._httpx
+            client = httpx.AsyncClient(
+                # Cleartext has no ALPN, so h2c needs prior knowledge
+                http1=scheme == "https",
+                http2=True,
+                verify=False,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(
+                    max_connections=None,
+                    max_keepalive_connections=None,
+                    keepalive_expiry=60,
+                ),
+            )
+            self._clients[scheme] = client
+        return client
+
+    async def request(
+        self, method: str, url: str, timeout: float, fields: Collection[str] = ()
+    ) -> TransportResponse:
+        parts = urlsplit(url)
+        streams = self._streams.get(parts.netloc)
+        if streams is None:
+            streams = self._streams[parts.netloc] = asyncio.Semaphore(self.max_streams)
+        httpx = self._httpx
+        async with streams:
+            try:
+                client = self._client(parts.scheme)
+                return await asyncio.wait_for(
+                    self._send(client, method, url, timeout, fields), timeout
+                )
+            except httpx.TimeoutException as exc:
+                raise asyncio.TimeoutError() from exc
+            except httpx.HTTPError as exc:
+                raise TransportError(str(exc) or type(exc).__name__) from exc
+
+    async def _send(
+        self, client, method: str, url: str, timeout: float, fields: Collection[str]
+    ) -> TransportResponse:
+        async with client.stream(method, url, timeout=timeout) as resp:
+            values = None
+            if fields and resp.status_code == 200:
+                values = await _read_fields(resp.aiter_bytes(), fields)
+            # Closing an HTTP/2 stream early only resets that stream; an
+            # HTTP/1.1 fallback connection has to be drained to be reused
+            if resp.http_version != "HTTP/2" and not resp.is_stream_consumed:
+                drained = 0
+                async for chunk in resp.aiter_raw():
+                    drained += len(chunk)
+                    if drained > DRAIN_LIMIT:
+                        break
+            return TransportResponse(resp.status_code, resp.headers, values)
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+async def warm_up(
+    transport: Transport, urls: Iterable[str], per_host: int, timeout: float
+) -> None:
+    """Send ``per_host`` concurrent GETs to each URL; failures are ignored."""
+    await asyncio.gather(
+        *(
+            transport.request("GET", url, timeout)
+            for url in urls
+            for _ in range(per_host)
+        ),
+        return_exceptions=True,
+    )
@@ -0,0 +1,124 @@
+"""
+Wordlist parsing and the optional length-bucketed index cache.
+
+Lines are validated with one compiled regular expression over the whole file
+instead of a per-character Python loop, and invalid entries are counted rather
+than reported one by one.
+
+The index (``<wordlist>.idx``) stores the valid words grouped by length, so a
+``--min``/``--max`` slice is read with a few seeks instead of re-parsing the
+file. Layout, little-endian::
+
+    magic       8 bytes  b"RCWLIDX1"
+    header      <QqII    source size, source mtime (ns), invalid count, buckets
+    bucket      <IIQQ    label length, word count, data offset, data bytes
+    data                 each bucket's words joined by "\\n" (ASCII)
+
+The index is rebuilt whenever the wordlist's size or mtime no longer match.
+Within a bucket words keep their file order; across buckets they come out
+shortest first.
+"""
+
+import os
+import re
+import struct
+import sys
+from typing import Dict, List, Tuple
+
+# A whole line holding one valid label, ignoring surrounding blanks
+_VALID_LINE = re.compile(r"^[ \t]*([a-z0-9-]+)[ \t\r]*$", re.MULTILINE)
+_NONBLANK_LINE = re.compile(r"^[ \t\r]*\S", re.MULTILINE)
+_ALLOWED = re.compile(r"[a-z0-9-]+")
+
+INDEX_MAGIC = b"RCWLIDX1"
+_HEADER = struct.Struct("<QqII")
+_BUCKET = struct.Struct("<IIQQ")
+
+
+def parse_words(text: str) -> Tuple[List[str], int, List[str]]:
+    """Valid labels of a wordlist, the number of invalid lines and a few examples."""
+    text = text.lower()
+    words = _VALID_LINE.findall(text)
+    invalid = len(_NONBLANK_LINE.findall(text)) - len(words)
+    examples: List[str] = []
+    if invalid:
+        for line in text.splitlines():
+            word = line.strip()
+            if word and not _ALLOWED.fullmatch(word):
+                examples.append(word)
+                if len(examples) == 3:
+                    break
+    return words, invalid, examples
+
+
+def is_valid_label(word: str) -> bool:
+    """True if ``word`` only has lowercase letters, digits and hyphens."""
+    return _ALLOWED.fullmatch(word) is not None
+
+
+def warn_invalid(path: str, invalid: int, examples: List[str] = ()) -> None:
+    if not invalid:
+        return
+    sample = f", e.g. {', '.join(repr(w) for w in examples)}" if examples else ""
+    print(
+        f"Warning: Skipped {invalid} words in {path} with characters not allowed "
+        f"in domain labels{sample}",
+        file=sys.stderr,
+    )
+
+
+def index_path(wordlist_path: str) -> str:
+    return f"{wordlist_path}.idx"
+
+
+def write_index(wordlist_path: str, words: List[str], invalid: int) -> None:
+    """Write the length-bucketed index next to the wordlist (atomically)."""
+    st = os.stat(wordlist_path)
+    buckets: Dict[int, List[str]] = {}
+    for word in words:
+        buckets.setdefault(len(word), []).append(word)
+    blobs = [(length, buckets[length]) for length in sorted(buckets)]
+    offset = len(INDEX_MAGIC) + _HEADER.size + _BUCKET.size * len(blobs)
+    table = []
+    data = []
+    for length, bucket in blobs:
+        blob = "\n".join(bucket).encode("ascii")
+        table.append(_BUCKET.pack(length, len(bucket), offset, len(blob)))
+        data.append(blob)
+        offset += len(blob)
+    path = index_path(wordlist_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_MAGIC)
+        f.write(_HEADER.pack(st.st_size, st.st_mtime_ns, invalid, len(blobs)))
+        f.writelines(table)
+        f.writelines(data)
+    os.replace(tmp_path, path)
+
+
+def read_index(
+    wordlist_path: str, min_len: int = 1, max_len: int = None
+) -> Tuple[List[str], int] | None:
+    """
+    Words of length ``min_len..max_len`` and the invalid count from the index, or
+    None when there is no index or it is stale or unreadable.
+    """
+    path = index_path(wordlist_path)
+    try:
+        st = os.stat(wordlist_path)
+        with open(path, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            size, mtime_ns, invalid, count = _HEADER.unpack(f.read(_HEADER.size))
+            if (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+                return None
+            table = [_BUCKET.unpack(f.read(_BUCKET.size)) for _ in range(count)]
+            words: List[str] = []
+            for length, _, offset, nbytes in table:
+                if length < min_len or (max_len is not None and length > max_len):
+                    continue
+                f.seek(offset)
+                words.extend(f.read(nbytes).decode("ascii").split("\n"))
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+    return words, invalid